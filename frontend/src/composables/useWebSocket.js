@@ -529,8 +529,9 @@ export function useWebSocket() {
     // immediate: false — connection is deferred until openWs() is called by App.vue
     // after authentication is confirmed. This prevents WebSocket errors when the
     // backend rejects unauthenticated connections.
+    // batch=1: the server may send several messages at once in a "batch" message
     const wsProtocol = location.protocol === 'https:' ? 'wss:' : 'ws:'
-    const { status, send, open, close } = useVueWebSocket(`${wsProtocol}//${location.host}/ws/`, {
+    const { status, send, open, close } = useVueWebSocket(`${wsProtocol}//${location.host}/ws/?batch=1`, {
         immediate: false,
         autoReconnect: {
             // Don't reconnect if the last close was an auth failure.
@@ -595,6 +596,16 @@ export function useWebSocket() {
 
     function handleMessage(msg) {
         switch (msg.type) {
+            case 'batch':
+                // Several messages sent together by the server, handled in order
+                for (const batchedMsg of msg.messages) {
+                    try {
+                        handleMessage(batchedMsg)
+                    } catch (e) {
+                        console.error('Error handling WebSocket message:', e, '\nMessage was:', batchedMsg)
+                    }
+                }
+                break
             case 'server_version':
                 console.log(`[TwiCC] Server version: ${msg.version}`)
                 store.setCurrentVersion(msg.version)
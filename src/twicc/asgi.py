@@ -514,6 +514,10 @@ class UpdatesConsumer(AsyncJsonWebsocketConsumer):
         messages by type. Example: ``?subscribe=process_state,active_processes``
         When set, only messages whose ``type`` matches the list are sent.
         When absent, all messages are sent (backward compatible).
+
+        Supports an optional ``batch`` query parameter (``?batch=1``) for clients
+        handling "batch" messages (``{"type": "batch", "messages": [...]}``).
+        Other clients receive the messages of a batch one by one.
         """
         # Check authentication if password protection is enabled
         if settings.TWICC_PASSWORD_HASH:
@@ -546,6 +550,7 @@ class UpdatesConsumer(AsyncJsonWebsocketConsumer):
             }
         else:
             self._subscribe_filter = None
+        self._accepts_batch = bool(params.get("batch"))
 
         await self.channel_layer.group_add("updates", self.channel_name)
         await self.accept()
@@ -712,6 +717,13 @@ class UpdatesConsumer(AsyncJsonWebsocketConsumer):
         except Exception as exc:
             logger.exception("Error sending JSON message: %s", exc)
 
+    async def send_text(self, text: str) -> None:
+        """Send an already JSON-encoded message, like send_json does for a dict."""
+        try:
+            await self.send(text_data=text)
+        except Exception as exc:
+            logger.exception("Error sending JSON message: %s", exc)
+
     async def _handle_send_message(self, content: dict) -> None:
         """Handle send_message request from client.
 
@@ -1486,7 +1498,25 @@ class UpdatesConsumer(AsyncJsonWebsocketConsumer):
         If the client connected with a ``subscribe`` filter, only messages
         whose type is in the filter are forwarded. Otherwise all messages
         are sent (default behavior for the TwiCC web UI).
+
+        Events carrying a pre-encoded ``text`` payload (see
+        ``sessions_watcher.broadcast_message``) are forwarded as-is, so the
+        JSON encoding is done once for all clients instead of once per client.
+        For a "batch" of messages, only unfiltered clients that opted in with the
+        ``batch`` query parameter receive the batch itself: the other clients
+        receive the messages (they subscribed to) one by one.
         """
+        text = event.get("text")
+        if text is not None:
+            if "parts" in event and (self._subscribe_filter or not self._accepts_batch):
+                texts = [part_text for part_type, part_text in event["parts"] if self._should_send(part_type)]
+            elif self._should_send(event.get("data_type", "")):
+                texts = [text]
+            else:
+                return
+            for message_text in texts:
+                await self.send_text(message_text)
+            return
         data = event["data"]
         if not self._should_send(data.get("type", "")):
             return
@@ -7,6 +7,7 @@ When TWICC_PASSWORD_HASH is empty/unset, all requests pass through (no protectio
 """
 
 import logging
+import time
 
 from django.conf import settings
 from django.http import JsonResponse
@@ -26,6 +27,9 @@ class PasswordAuthMiddleware:
     Checks request.session["authenticated"] for all requests except
     public paths. Returns 401 JSON for API requests, 401 JSON for
     SPA requests (frontend handles redirect to login).
+
+    Also refreshes the expiry of authenticated sessions, at most once per
+    SESSION_REFRESH_INTERVAL (sessions are not saved on every request).
     """
 
     def __init__(self, get_response):
@@ -57,4 +61,9 @@ class PasswordAuthMiddleware:
                 status=401,
             )
 
+        # Modifying the session makes SessionMiddleware save it, which refreshes its expiry
+        now = int(time.time())
+        if now - request.session.get("refreshed_at", 0) >= settings.SESSION_REFRESH_INTERVAL:
+            request.session["refreshed_at"] = now
+
         return self.get_response(request)
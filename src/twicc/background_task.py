@@ -110,6 +110,24 @@ def stop_background_task(ctx: ComputeContext) -> None:
 # =============================================================================
 
 
+def _use_direct_log_handlers() -> None:
+    """
+    Make the twicc logger write its records directly instead of through the logging queue.
+
+    The worker process ends without running atexit handlers (and may be terminated),
+    so records still waiting in the queue would be lost.
+    """
+    from logging.handlers import QueueHandler
+
+    twicc_logger = logging.getLogger('twicc')
+    for handler in list(twicc_logger.handlers):
+        if isinstance(handler, QueueHandler) and handler.listener is not None:
+            handler.listener.stop()
+            twicc_logger.removeHandler(handler)
+            for target in handler.listener.handlers:
+                twicc_logger.addHandler(target)
+
+
 def compute_worker_main(command_queue, result_queue, stop_event) -> None:
     """
     Main function running in the compute worker process.
@@ -131,6 +149,7 @@ def compute_worker_main(command_queue, result_queue, stop_event) -> None:
     django.setup()
 
     import logging
+    _use_direct_log_handlers()
     worker_logger = logging.getLogger(__name__)
 
     from twicc.compute_batch import compute_session_metadata
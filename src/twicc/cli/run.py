@@ -66,6 +66,21 @@ from twicc.version_check_task import start_version_check_task, stop_version_chec
 from twicc.agent.original_file_cache import start_cleanup_task as start_original_file_cache_cleanup, stop_cleanup_task as stop_original_file_cache_cleanup  # noqa: E402
 
 
+def _get_event_loop_factory():
+    """Return uvloop's event loop factory if uvloop is installed, else None (default asyncio loop).
+
+    uvloop is not a dependency (it doesn't support Windows), but when available its
+    libuv-based loop lowers the per-callback overhead of everything running in the
+    server loop: the file watcher, the WebSocket broadcasts, the background tasks.
+    """
+    try:
+        import uvloop
+    except ImportError:
+        return None
+    logger.info("Using uvloop event loop")
+    return uvloop.new_event_loop
+
+
 def _count_total_sessions() -> int:
     """Quick filesystem-only count of session files across all projects.
 
@@ -371,4 +386,4 @@ def main():
     logging.getLogger("twicc").removeHandler(_startup_console)
 
     # Run async server (initial sync runs as an async task inside run_server)
-    asyncio.run(run_server(port_int))
+    asyncio.run(run_server(port_int), loop_factory=_get_event_loop_factory())
@@ -20,7 +20,8 @@ from typing import Any, NamedTuple
 import xmltodict
 from django.conf import settings
 from django.core.exceptions import MultipleObjectsReturned
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Count, Max, Q
 
 from twicc.core.enums import ItemDisplayLevel, ItemKind
 from twicc.core.models import AgentLink, Project, Session, SessionItem, SessionType, ToolResultLink
@@ -89,6 +90,11 @@ _project_directories: dict[str, str | None] = {}
 # Module-level cache: project_id -> git_root (can be None)
 _project_git_roots: dict[str, str | None] = {}
 
+# Changes of these caches (and of the agent caches below) that follow a DB write are applied
+# with transaction.on_commit: when called in a transaction (like the watcher's sync of a
+# session), they are applied only if the transaction is committed, else they are applied
+# right away.
+
 
 def load_project_directories() -> None:
     """
@@ -152,7 +158,7 @@ def ensure_project_directory(project_id: str, cwd: str) -> None:
     # Update DB and cache, and set stale based on directory existence
     should_be_stale = not os.path.isdir(cwd)
     Project.objects.filter(id=project_id).update(directory=cwd, stale=should_be_stale)
-    _project_directories[project_id] = cwd
+    transaction.on_commit(lambda: _project_directories.update({project_id: cwd}))
 
     # Re-resolve git_root when directory changes
     ensure_project_git_root(project_id, cwd)
@@ -182,15 +188,18 @@ def ensure_project_git_root(project_id: str, directory: str | None = None) -> No
             return
 
     result = resolve_git_from_path(directory, use_cache=False)
-    git_root = result[0] if result else None
+    store_project_git_root(project_id, result[0] if result else None)
+
 
+def store_project_git_root(project_id: str, git_root: str | None) -> None:
+    """Store a resolved git_root for a project (DB and cache), if it changed."""
     # Check if update needed
     if _project_git_roots.get(project_id) == git_root:
         return
 
     # Update DB and cache
     Project.objects.filter(id=project_id).update(git_root=git_root)
-    _project_git_roots[project_id] = git_root
+    transaction.on_commit(lambda: _project_git_roots.update({project_id: git_root}))
 
 
 def update_project_total_cost(project_id: str) -> None:
@@ -208,21 +217,25 @@ def update_project_total_cost(project_id: str) -> None:
     project.save(update_fields=["total_cost"])
 
 
-def update_project_metadata(project_id: str) -> None:
-    """Update project sessions_count, mtime, and total_cost from its sessions."""
+def update_project_metadata(project_id: str) -> Project | None:
+    """
+    Update project sessions_count, mtime, and total_cost from its sessions.
+
+    Returns the updated project (None if it doesn't exist), so callers
+    don't have to reload it from the database.
+    """
     try:
         project = Project.objects.get(id=project_id)
     except Project.DoesNotExist:
-        return
-    sessions = Session.objects.filter(
+        return None
+    stats = Session.objects.filter(
         project=project, type=SessionType.SESSION, created_at__isnull=False, user_message_count__gt=0
-    )
-    project.sessions_count = sessions.count()
-    max_mtime = sessions.order_by("-mtime").values_list("mtime", flat=True).first()
-    project.mtime = max_mtime or 0
-    project.save(update_fields=["sessions_count", "mtime"])
-
-    update_project_total_cost(project_id)
+    ).aggregate(sessions_count=Count("id"), max_mtime=Max("mtime"))
+    project.sessions_count = stats["sessions_count"]
+    project.mtime = stats["max_mtime"] or 0
+    project.recalculate_total_cost()
+    project.save(update_fields=["sessions_count", "mtime", "total_cost"])
+    return project
 
 
 # =============================================================================
@@ -1591,23 +1604,167 @@ def _find_open_group_head(session_id: str, before_line_num: int) -> int | None:
     if not previous:
         return None
 
+    parsed = None
+    if previous.display_level == ItemDisplayLevel.ALWAYS:
+        try:
+            parsed = orjson.loads(previous.content)
+        except orjson.JSONDecodeError:
+            return None
+
+    return _open_group_head_after(previous, parsed)
+
+
+def _open_group_head_after(previous: SessionItem, parsed_json: dict | None) -> int | None:
+    """
+    Return the head of the group left open by the given (non-DEBUG_ONLY) item, if any.
+
+    parsed_json is only needed (and only used) for ALWAYS items, to detect a collapsible suffix.
+    """
     # COLLAPSIBLE with group_head = group is open
     if previous.display_level == ItemDisplayLevel.COLLAPSIBLE and previous.group_head:
         return previous.group_head
 
     # ALWAYS with suffix = check if it has collapsible suffix
-    if previous.display_level == ItemDisplayLevel.ALWAYS:
-        try:
-            parsed = orjson.loads(previous.content)
-            _, has_suffix = _detect_prefix_suffix(parsed, previous.kind)
-            if has_suffix:
-                return previous.line_num  # ALWAYS item is the head
-        except orjson.JSONDecodeError:
-            pass
+    if previous.display_level == ItemDisplayLevel.ALWAYS and parsed_json is not None:
+        _, has_suffix = _detect_prefix_suffix(parsed_json, previous.kind)
+        if has_suffix:
+            return previous.line_num  # ALWAYS item is the head
 
     return None
 
 
+def _extend_group_in_db(session_id: str, group_head: int, group_tail: int) -> set[int]:
+    """
+    Set the new tail of a group on all its items already in the database.
+
+    Returns the line_nums of the items that were updated (the group items before
+    group_tail, and the head itself if it is an ALWAYS item that started the group via suffix).
+    """
+    modified_line_nums: set[int] = set()
+
+    # Get line_nums of pre-existing items that will be updated
+    affected_collapsibles = SessionItem.objects.filter(
+        session_id=session_id,
+        group_head=group_head,
+        line_num__lt=group_tail
+    ).values_list('line_num', flat=True)
+    modified_line_nums.update(affected_collapsibles)
+
+    # Check if ALWAYS started this group
+    always_starter = SessionItem.objects.filter(
+        session_id=session_id,
+        line_num=group_head,
+        display_level=ItemDisplayLevel.ALWAYS
+    ).exists()
+    if always_starter:
+        modified_line_nums.add(group_head)
+
+    # Update all items in group with new tail
+    SessionItem.objects.filter(
+        session_id=session_id,
+        group_head=group_head
+    ).update(group_tail=group_tail)
+
+    # Also update ALWAYS item if it started the group (via suffix)
+    SessionItem.objects.filter(
+        session_id=session_id,
+        line_num=group_head,
+        display_level=ItemDisplayLevel.ALWAYS
+    ).update(group_tail=group_tail)
+
+    return modified_line_nums
+
+
+class LiveGroupBatch:
+    """
+    In-memory group context for a batch of new items synced together by the watcher.
+
+    Without a batch, compute_item_metadata_live() expects each item to be saved
+    before the next one is processed: the open group is found by querying the
+    previous item, and group tails are updated with one UPDATE per item.
+
+    With a batch, items of the current sync are tracked (and updated) in memory,
+    so they don't need to be in the database yet, and the caller can persist all
+    of them at once. Only groups started before the batch are read from the
+    database, and their pre-existing items get their new tail in flush().
+
+    Usage:
+        batch = LiveGroupBatch(session_id)
+        for item, parsed in items:
+            compute_item_metadata_live(session_id, item, parsed, batch)
+        SessionItem.objects.bulk_create(items)
+        batch.flush()
+    """
+
+    def __init__(self, session_id: str) -> None:
+        self.session_id = session_id
+        # Last non-DEBUG_ONLY item of the batch (and its parsed content)
+        self._last_item: SessionItem | None = None
+        self._last_parsed: dict | None = None
+        # Batch items, by line_num and by group_head
+        self._items_by_line: dict[int, SessionItem] = {}
+        self._items_by_head: dict[int, list[SessionItem]] = {}
+        # Groups started before the batch: group_head -> line_nums of their pre-existing items
+        self._existing_groups: dict[int, set[int]] = {}
+        # Groups started before the batch: group_head -> new group_tail to write in flush()
+        self._existing_tails: dict[int, int] = {}
+
+    def find_open_group_head(self, before_line_num: int) -> int | None:
+        """Find the head of any open group before the given line number."""
+        if self._last_item is None:
+            # Nothing groupable yet in this batch: look at the database
+            return _find_open_group_head(self.session_id, before_line_num)
+        return _open_group_head_after(self._last_item, self._last_parsed)
+
+    def extend_group(self, group_head: int, group_tail: int) -> set[int]:
+        """
+        Set the new tail of a group on all its items.
+
+        Returns the line_nums of pre-existing items whose group_tail will change.
+        """
+        for batch_item in self._items_by_head.get(group_head, ()):
+            batch_item.group_tail = group_tail
+
+        head_item = self._items_by_line.get(group_head)
+        if head_item is not None:
+            # Group started in this batch: all its items are in memory
+            if head_item.display_level == ItemDisplayLevel.ALWAYS:
+                head_item.group_tail = group_tail
+            return set()
+
+        # Group started before this batch: its pre-existing items are updated in flush()
+        if group_head not in self._existing_groups:
+            self._existing_groups[group_head] = set(
+                SessionItem.objects.filter(
+                    Q(group_head=group_head) | Q(line_num=group_head, display_level=ItemDisplayLevel.ALWAYS),
+                    session_id=self.session_id,
+                ).values_list('line_num', flat=True)
+            )
+        self._existing_tails[group_head] = group_tail
+        return set(self._existing_groups[group_head])
+
+    def add(self, item: SessionItem, parsed_json: dict) -> None:
+        """Register a processed (non-DEBUG_ONLY) item of the batch."""
+        self._items_by_line[item.line_num] = item
+        if item.group_head is not None:
+            self._items_by_head.setdefault(item.group_head, []).append(item)
+        self._last_item = item
+        self._last_parsed = parsed_json
+
+    def flush(self) -> None:
+        """Write the new tails of groups started before the batch to the database.
+
+        Only the pre-existing items of these groups are updated: the items of the batch
+        may already be saved with their group_head, and have their own group_tail.
+        """
+        for group_head, group_tail in self._existing_tails.items():
+            SessionItem.objects.filter(
+                session_id=self.session_id,
+                line_num__in=self._existing_groups[group_head],
+            ).update(group_tail=group_tail)
+        self._existing_tails.clear()
+
+
 def create_tool_result_link_live(
     session_id: str, item: SessionItem, parsed_json: dict
 ) -> ToolResultUpdate | None:
@@ -1619,8 +1776,6 @@ def create_tool_result_link_live(
 
     Returns a ToolResultUpdate if the tool is tracked (Bash/Task/Agent), None otherwise.
     """
-    from twicc.core.models import ToolResultLink
-
     tool_use_id = get_tool_result_id(parsed_json)
     if not tool_use_id:
         return None
@@ -1659,14 +1814,12 @@ def create_tool_result_link_live(
             links = ToolResultLink.objects.filter(
                 session_id=session_id,
                 tool_use_id=tool_use_id,
-            )
-            result_count = links.count()
-            max_timestamp = links.order_by('-tool_result_at').values_list('tool_result_at', flat=True).first()
+            ).aggregate(result_count=Count('id'), max_timestamp=Max('tool_result_at'))
             return ToolResultUpdate(
                 session_id=session_id,
                 tool_use_id=tool_use_id,
-                result_count=result_count,
-                completed_at=max_timestamp,
+                result_count=links['result_count'],
+                completed_at=links['max_timestamp'],
                 extra=extra,
                 error=error,
                 tool_result_line_num=item.line_num,
@@ -1687,8 +1840,6 @@ def check_agent_naturally_stopped(
 
     Returns an AgentStoppedUpdate if the agent stopped, None otherwise.
     """
-    from twicc.core.models import AgentLink, Session
-
     # Find the AgentLink for this tool_use_id
     agent_link = AgentLink.objects.filter(
         session_id=session_id,
@@ -1729,8 +1880,6 @@ def create_agent_link_from_tool_result(session_id: str, item: SessionItem, parse
 
     Returns an AgentLinkUpdate if a link was created, None otherwise.
     """
-    from twicc.core.models import AgentLink
-
     agent_info = get_tool_result_agent_info(parsed_json)
     if not agent_info:
         return None
@@ -1819,9 +1968,12 @@ AGENTS_PROMPT_CACHE: dict[tuple[str, str], str] = {}
 
 
 def mark_agent_link_done(session_id: str, agent_id: str) -> None:
-    """Mark that we've created the agent link for this subagent."""
-    AGENTS_LINKS_DONE_CACHE.add((session_id, agent_id))
-    uncache_agent_prompt(session_id, agent_id)
+    """Mark that we've created the agent link for this subagent (once committed)."""
+    def mark() -> None:
+        AGENTS_LINKS_DONE_CACHE.add((session_id, agent_id))
+        uncache_agent_prompt(session_id, agent_id)
+
+    transaction.on_commit(mark)
 
 
 def is_agent_link_done(session_id: str, agent_id: str) -> bool:
@@ -1835,8 +1987,8 @@ def get_cached_agent_prompt(session_id: str, agent_id: str) -> str | None:
 
 
 def cache_agent_prompt(session_id: str, agent_id: str, prompt: str) -> None:
-    """Set the prompt for a subagent in the cache."""
-    AGENTS_PROMPT_CACHE[(session_id, agent_id)] = prompt
+    """Set the prompt for a subagent in the cache (once committed)."""
+    transaction.on_commit(lambda: AGENTS_PROMPT_CACHE.update({(session_id, agent_id): prompt}))
 
 
 def uncache_agent_prompt(session_id: str, agent_id: str) -> None:
@@ -1859,8 +2011,6 @@ def create_agent_link_from_subagent(
 
     Returns an AgentLinkUpdate if the link was created, None otherwise.
     """
-    from twicc.core.models import AgentLink
-
     if is_agent_link_done(parent_session_id, agent_id):
         return None
 
@@ -1933,8 +2083,6 @@ def create_agent_link_from_tool_use(
 
     Returns a list of AgentLinkUpdates for each link created.
     """
-    from twicc.core.models import AgentLink
-
     # Extract assistant message content
     content = get_message_content_list(parsed_json, "assistant")
     if content is None:
@@ -1954,7 +2102,10 @@ def create_agent_link_from_tool_use(
     subagents = Session.objects.filter(
         parent_session_id=session_id,
         type=SessionType.SUBAGENT,
-    )
+    ).only("id")
+
+    # Agents already linked in this session (one query, not one per subagent)
+    linked_agent_ids = set(AgentLink.objects.filter(session_id=session_id).values_list("agent_id", flat=True))
 
     # For each subagent, check if its prompt matches one of our Task tool_use prompts
     for subagent in subagents:
@@ -1962,10 +2113,7 @@ def create_agent_link_from_tool_use(
             continue
 
         # Check if link already exists
-        if AgentLink.objects.filter(
-            session_id=session_id,
-            agent_id=subagent.id,
-        ).exists():
+        if subagent.id in linked_agent_ids:
             mark_agent_link_done(session_id, subagent.id)
             continue
 
@@ -1976,7 +2124,7 @@ def create_agent_link_from_tool_use(
             first_user_message = SessionItem.objects.filter(
                 session_id=subagent.id,
                 kind=ItemKind.USER_MESSAGE,
-            ).first()
+            ).only("content").first()
             if first_user_message is None:
                 continue
             try:
@@ -2016,7 +2164,12 @@ def create_agent_link_from_tool_use(
     return updates
 
 
-def compute_item_metadata_live(session_id: str, item: SessionItem, parsed_json: dict) -> set[int]:
+def compute_item_metadata_live(
+    session_id: str,
+    item: SessionItem,
+    parsed_json: dict,
+    batch: LiveGroupBatch | None = None,
+) -> set[int]:
     """
     Compute metadata for a single item during live sync.
 
@@ -2026,6 +2179,9 @@ def compute_item_metadata_live(session_id: str, item: SessionItem, parsed_json:
         session_id: The session ID
         item: The SessionItem object (already has line_num and content set)
         parsed_json: The already-parsed JSON content (possibly transformed)
+        batch: Optional LiveGroupBatch of the current sync. When given, previous items
+            of the batch are read and updated in memory instead of in the database,
+            and the caller is responsible for saving them (see LiveGroupBatch).
 
     Returns:
         Set of line_nums of pre-existing items whose group_tail was updated
@@ -2046,43 +2202,19 @@ def compute_item_metadata_live(session_id: str, item: SessionItem, parsed_json:
     modified_line_nums: set[int] = set()
 
     # Find if there's an open group before us
-    open_group_head = _find_open_group_head(session_id, item.line_num)
+    if batch is not None:
+        open_group_head = batch.find_open_group_head(item.line_num)
+    else:
+        open_group_head = _find_open_group_head(session_id, item.line_num)
+
+    joins_group = False
 
     if item.display_level == ItemDisplayLevel.COLLAPSIBLE:
         if open_group_head is not None:
             # Join existing group
             item.group_head = open_group_head
             item.group_tail = item.line_num
-
-            # Get line_nums of pre-existing items that will be updated
-            affected_collapsibles = SessionItem.objects.filter(
-                session_id=session_id,
-                group_head=open_group_head,
-                line_num__lt=item.line_num
-            ).values_list('line_num', flat=True)
-            modified_line_nums.update(affected_collapsibles)
-
-            # Check if ALWAYS started this group
-            always_starter = SessionItem.objects.filter(
-                session_id=session_id,
-                line_num=open_group_head,
-                display_level=ItemDisplayLevel.ALWAYS
-            ).exists()
-            if always_starter:
-                modified_line_nums.add(open_group_head)
-
-            # Update all items in group with new tail
-            SessionItem.objects.filter(
-                session_id=session_id,
-                group_head=open_group_head
-            ).update(group_tail=item.line_num)
-
-            # Also update ALWAYS item if it started the group (via suffix)
-            SessionItem.objects.filter(
-                session_id=session_id,
-                line_num=open_group_head,
-                display_level=ItemDisplayLevel.ALWAYS
-            ).update(group_tail=item.line_num)
+            joins_group = True
         else:
             # Start new group
             item.group_head = item.line_num
@@ -2094,39 +2226,19 @@ def compute_item_metadata_live(session_id: str, item: SessionItem, parsed_json:
         # Handle prefix
         if has_prefix and open_group_head is not None:
             item.group_head = open_group_head
-
-            # Get line_nums of pre-existing items that will be updated
-            affected_collapsibles = SessionItem.objects.filter(
-                session_id=session_id,
-                group_head=open_group_head,
-                line_num__lt=item.line_num
-            ).values_list('line_num', flat=True)
-            modified_line_nums.update(affected_collapsibles)
-
-            # Check if ALWAYS started this group
-            always_starter = SessionItem.objects.filter(
-                session_id=session_id,
-                line_num=open_group_head,
-                display_level=ItemDisplayLevel.ALWAYS
-            ).exists()
-            if always_starter:
-                modified_line_nums.add(open_group_head)
-
-            # Update all items in group with new tail (this item)
-            SessionItem.objects.filter(
-                session_id=session_id,
-                group_head=open_group_head
-            ).update(group_tail=item.line_num)
-
-            # Also update ALWAYS item if it started the group
-            SessionItem.objects.filter(
-                session_id=session_id,
-                line_num=open_group_head,
-                display_level=ItemDisplayLevel.ALWAYS
-            ).update(group_tail=item.line_num)
+            joins_group = True
 
         # Suffix: group_tail stays null until next item arrives and connects
         # (will be updated by next item's compute_item_metadata_live)
 
-    return modified_line_nums
+    if joins_group:
+        # Update all items in group with new tail (this item)
+        if batch is not None:
+            modified_line_nums.update(batch.extend_group(open_group_head, item.line_num))
+        else:
+            modified_line_nums.update(_extend_group_in_db(session_id, open_group_head, item.line_num))
 
+    if batch is not None:
+        batch.add(item, parsed_json)
+
+    return modified_line_nums
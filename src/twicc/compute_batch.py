@@ -19,6 +19,7 @@ from typing import NamedTuple
 
 import orjson
 from django.conf import settings
+from django.db.models import Case, CharField, Value, When
 
 from twicc.compute import (
     AGENT_TOOL_NAMES,
@@ -823,6 +824,14 @@ def apply_session_complete(msg: dict) -> None:
     # 5. Update session fields (always includes compute_version)
     session_fields = msg.get('session_fields', {})
     if session_fields:
+        # The watcher may have synced new items while the worker was computing, and it only
+        # increments user_message_count from the stored value once the session is computed:
+        # count from the DB (item kinds are updated above) rather than using the worker's count.
+        if 'user_message_count' in session_fields:
+            session_fields['user_message_count'] = SessionItem.objects.filter(
+                session_id=session_id,
+                kind=ItemKind.USER_MESSAGE,
+            ).count()
         # Handle datetime fields
         for dt_field in ('created_at', 'last_started_at', 'last_updated_at', 'last_stopped_at'):
             if dt_field in session_fields and session_fields[dt_field] is not None:
@@ -837,20 +846,23 @@ def apply_session_complete(msg: dict) -> None:
             )
 
     # 6. Recalculate session costs from SessionItem data (idempotent, order-independent)
-    session = Session.objects.get(id=session_id)
-    session.recalculate_costs()
-    session.save(update_fields=["self_cost", "subagents_cost", "total_cost"])
-
-    # 7. Recalculate parent session costs if subagent
-    if session.parent_session_id:
-        parent = Session.objects.get(id=session.parent_session_id)
-        parent.recalculate_costs()
-        parent.save(update_fields=["self_cost", "subagents_cost", "total_cost"])
+    # 7. ... and the parent session costs if subagent, in the same UPDATE statement
+    parent_session_id = Session.objects.filter(id=session_id).values_list(
+        "parent_session_id", flat=True
+    ).first()
+    Session.recalculate_costs_for(
+        [session_id, parent_session_id] if parent_session_id else [session_id]
+    )
 
-    # 8. Update session titles
+    # 8. Update session titles (in a single UPDATE, whatever the number of target sessions)
     titles = msg.get('titles', {})
-    for target_id, title in titles.items():
-        Session.objects.filter(id=target_id).update(title=title)
+    if titles:
+        Session.objects.filter(id__in=list(titles)).update(
+            title=Case(
+                *(When(id=target_id, then=Value(title)) for target_id, title in titles.items()),
+                output_field=CharField(),
+            )
+        )
 
     # 9. Update project directory
     project_id = msg.get('project_id')
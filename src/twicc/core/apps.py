@@ -1,3 +1,5 @@
+import atexit
+import logging
 import os
 import time
 
@@ -15,3 +17,10 @@ class CoreConfig(AppConfig):
         if "TZ" in os.environ:
             del os.environ["TZ"]
             time.tzset()
+
+        # Start the thread writing the log records put in the queue by the "queue"
+        # handler (see LOGGING), and write the remaining ones at exit.
+        queue_handler = logging.getHandlerByName("queue")
+        if queue_handler is not None and queue_handler.listener is not None:
+            queue_handler.listener.start()
+            atexit.register(queue_handler.listener.stop)
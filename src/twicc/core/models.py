@@ -149,7 +149,7 @@ class PeriodicActivity(models.Model):
             project_id: The project ID, or None for global (all projects).
             activity_date: The date (day for DailyActivity, Monday for WeeklyActivity).
         """
-        from django.db.models import Q, Sum
+        from django.db.models import Count, Q, Sum
 
         from twicc.core.enums import ItemKind
 
@@ -159,22 +159,22 @@ class PeriodicActivity(models.Model):
         item_project_filter = Q(session__project_id=project_id) if project_id is not None else Q()
         session_project_filter = Q(project_id=project_id) if project_id is not None else Q()
 
-        # user_message_count: only from type=SESSION sessions
-        user_message_count = SessionItem.objects.filter(
+        # Both item counters in a single pass over the items of the period:
+        # - user_message_count: only from type=SESSION sessions
+        # - cost: from ALL session types (NULL costs are ignored by SUM)
+        item_totals = SessionItem.objects.filter(
             item_project_filter,
-            kind=ItemKind.USER_MESSAGE,
             timestamp__gte=date_start,
             timestamp__lt=date_end,
-            session__type=SessionType.SESSION,
-        ).count()
-
-        # cost: from ALL session types
-        cost = SessionItem.objects.filter(
-            item_project_filter,
-            cost__isnull=False,
-            timestamp__gte=date_start,
-            timestamp__lt=date_end,
-        ).aggregate(total=Sum("cost"))["total"] or Decimal(0)
+        ).aggregate(
+            user_message_count=Count(
+                "pk",
+                filter=Q(kind=ItemKind.USER_MESSAGE, session__type=SessionType.SESSION),
+            ),
+            cost=Sum("cost"),
+        )
+        user_message_count = item_totals["user_message_count"]
+        cost = item_totals["cost"] or Decimal(0)
 
         # session_count: only type=SESSION sessions with at least one user message
         session_count = Session.objects.filter(
@@ -380,6 +380,39 @@ class Session(models.Model):
         total = (self.self_cost or Decimal(0)) + (self.subagents_cost or Decimal(0))
         self.total_cost = total if total > 0 else None
 
+    @staticmethod
+    def recalculate_costs_for(session_ids) -> None:
+        """Recalculate and save the costs of the given sessions, in a single UPDATE statement.
+
+        Same values as recalculate_costs(), computed by correlated subqueries.
+        """
+        from django.db.models import OuterRef, Subquery, Sum
+        from django.db.models.functions import Coalesce, NullIf
+
+        cost_field = models.DecimalField(max_digits=10, decimal_places=6)
+        self_cost = Subquery(
+            SessionItem.objects.filter(session=OuterRef("pk"), cost__isnull=False)
+            .order_by()
+            .values("session")
+            .annotate(total=Sum("cost"))
+            .values("total"),
+            output_field=cost_field,
+        )
+        subagents_cost = Subquery(
+            SessionItem.objects.filter(session__parent_session=OuterRef("pk"), cost__isnull=False)
+            .order_by()
+            .values("session__parent_session")
+            .annotate(total=Sum("cost"))
+            .values("total"),
+            output_field=cost_field,
+        )
+        zero = models.Value(Decimal(0), output_field=cost_field)
+        Session.objects.filter(id__in=session_ids).update(
+            self_cost=self_cost,
+            subagents_cost=subagents_cost,
+            total_cost=NullIf(Coalesce(self_cost, zero) + Coalesce(subagents_cost, zero), zero),
+        )
+
     def __str__(self):
         return self.id
 
@@ -13,15 +13,19 @@ import re
 import sys
 import threading
 import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from functools import lru_cache
 from pathlib import Path
 from typing import TYPE_CHECKING
 
 from django.conf import settings
+from django.core.signals import setting_changed
+from django.db.models import Count, Q, Sum
+from django.dispatch import receiver
 
-from twicc.compute import (
-    ensure_project_git_root,
-    update_project_total_cost,
-)
+from twicc.compute import resolve_git_from_path, store_project_git_root
 from twicc.core.models import Project, Session, SessionItem, SessionType
 
 logger = logging.getLogger(__name__)
@@ -55,17 +59,27 @@ def is_subagent_file(path: Path) -> bool:
     )
 
 
+@lru_cache(maxsize=1)
 def get_projects_dir() -> Path:
-    """Get the Claude projects directory from settings."""
+    """Get the Claude projects directory from settings (cached, called for every scanned session)."""
     return Path(settings.CLAUDE_PROJECTS_DIR)
 
 
+@receiver(setting_changed)
+def _clear_projects_dir_cache(setting, **kwargs) -> None:
+    """Forget the cached projects directory when CLAUDE_PROJECTS_DIR is overridden (tests)."""
+    if setting == "CLAUDE_PROJECTS_DIR":
+        get_projects_dir.cache_clear()
+
+
 def scan_projects() -> set[str]:
     """Scan the projects directory and return the set of project folder names."""
-    projects_dir = get_projects_dir()
-    if not projects_dir.exists():
+    # scandir entries know their type from the directory listing: no stat call per folder
+    try:
+        with os.scandir(get_projects_dir()) as entries:
+            return {entry.name for entry in entries if entry.is_dir()}
+    except FileNotFoundError:
         return set()
-    return {d.name for d in projects_dir.iterdir() if d.is_dir()}
 
 
 def scan_sessions(project_id: str) -> dict[str, Path]:
@@ -74,14 +88,32 @@ def scan_sessions(project_id: str) -> dict[str, Path]:
 
     Returns a dict mapping session id (filename without extension) to Path.
     """
+    return scan_project(project_id)[0]
+
+
+def scan_project(project_id: str) -> tuple[dict[str, Path], set[str]]:
+    """
+    Scan a project folder and return its session files and the names of its sub-folders.
+
+    Sub-folders are named after the session they belong to (they hold its subagents), so
+    sessions without one don't need their subagents folder to be scanned.
+
+    Returns a (session id -> Path, sub-folder names) tuple.
+    """
     project_dir = get_projects_dir() / project_id
-    if not project_dir.exists():
-        return {}
-    return {
-        f.stem: f
-        for f in project_dir.iterdir()
-        if f.is_file() and is_session_file(f)
-    }
+    session_files: dict[str, Path] = {}
+    folder_names: set[str] = set()
+    # scandir entries know their type from the directory listing: no stat call per file
+    try:
+        with os.scandir(project_dir) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    folder_names.add(entry.name)
+                elif entry.is_file() and is_session_file(path := Path(entry.path)):
+                    session_files[path.stem] = path
+    except FileNotFoundError:
+        pass
+    return session_files, folder_names
 
 
 def scan_subagents(project_id: str, session_id: str) -> dict[str, Path]:
@@ -91,13 +123,20 @@ def scan_subagents(project_id: str, session_id: str) -> dict[str, Path]:
     Returns a dict mapping agent_id (e.g., "a6c7d21") to Path.
     """
     subagents_dir = get_projects_dir() / project_id / session_id / "subagents"
-    if not subagents_dir.exists():
+    # scandir entries know their type from the directory listing: no stat call per file
+    try:
+        with os.scandir(subagents_dir) as entries:
+            return {
+                path.stem.removeprefix("agent-"): path
+                for entry in entries
+                if entry.is_file() and is_subagent_file(path := Path(entry.path))
+            }
+    except FileNotFoundError:
         return {}
-    return {
-        f.stem.removeprefix("agent-"): f
-        for f in subagents_dir.iterdir()
-        if f.is_file() and is_subagent_file(f)
-    }
+
+
+# Size of the chunks read when probing a file for content
+_CONTENT_PROBE_SIZE = 4096
 
 
 def check_file_has_content(file_path: Path) -> bool:
@@ -106,23 +145,40 @@ def check_file_has_content(file_path: Path) -> bool:
 
     This function performs no database operations and is used to determine
     if a session should be created before saving it.
+
+    Empty files are detected from their size, without opening them. Otherwise
+    the file is read by small chunks until a non-whitespace byte is found
+    (almost always in the first chunk), instead of reading a whole first line
+    that can be megabytes long.
     """
-    if not file_path.exists():
+    try:
+        if os.stat(file_path).st_size == 0:
+            return False
+        with open(file_path, "rb") as f:
+            while chunk := f.read(_CONTENT_PROBE_SIZE):
+                if chunk.strip():
+                    return True
+    except FileNotFoundError:
         return False
-
-    with open(file_path, "r", encoding="utf-8") as f:
-        for line in f:
-            if line.strip():
-                return True
     return False
 
 
+# Buffer size used when reading new lines of a session file: fewer, larger reads than
+# with the default 8 KiB buffer, for files that can be hundreds of megabytes
+_READ_BUFFER_SIZE = 1 << 20
+
+# Number of new items inserted (and tracked in the session) at once, to bound the memory
+# used to sync big files
+_ITEMS_BATCH_SIZE = 2000
+
+
 def _sync_session_items(session: Session, file_path: Path) -> list[int]:
     """
     Read new lines from a JSONL file and insert them as raw SessionItem rows.
 
     No JSON parsing is done. All metadata computation is deferred to the
-    background compute task (compute_session_metadata).
+    background compute task (compute_session_metadata): when new items are
+    added, the session compute_version is reset (saved with the tracking fields).
 
     Used by sync_project/sync_all for the initial sync where speed matters
     and metadata will be computed in background anyway.
@@ -134,10 +190,10 @@ def _sync_session_items(session: Session, file_path: Path) -> list[int]:
     Returns:
         List of line_nums of new items added
     """
-    if not file_path.exists():
+    try:
+        stat = file_path.stat()
+    except FileNotFoundError:
         return []
-
-    stat = file_path.stat()
     file_mtime = stat.st_mtime
 
     # If mtime hasn't changed and file hasn't grown beyond last_offset, nothing to do.
@@ -146,68 +202,102 @@ def _sync_session_items(session: Session, file_path: Path) -> list[int]:
     if session.mtime == file_mtime and session.last_offset >= stat.st_size:
         return []
 
-    with open(file_path, "r", encoding="utf-8") as f:
+    new_line_nums: list[int] = []
+
+    with open(file_path, "rb", buffering=_READ_BUFFER_SIZE) as f:
         # Seek to last known position
-        f.seek(session.last_offset)
-
-        # Read remaining content
-        new_content = f.read()
-        if not new_content:
-            # Update mtime even if no new content (file may have been touched)
-            session.mtime = file_mtime
-            session.save(update_fields=["mtime"])
-            return []
-
-        # Split into lines (filter out empty lines)
-        lines = [line for line in new_content.split("\n") if line.strip()]
-
-        actually_new_count = 0
-
-        if lines:
-            # Create SessionItem objects for bulk insert (raw content only)
-            current_line_num = session.last_line
-            items_to_create: list[SessionItem] = []
-
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    line = "{}"
-                current_line_num += 1
-                items_to_create.append(SessionItem(
-                    session=session,
-                    line_num=current_line_num,
-                    content=line,
-                ))
-
-            # Check how many of these line_nums already exist in the DB.
-            # This can happen when the watcher already inserted items (during a previous run)
-            # but the session's tracking fields (last_line, last_offset, mtime) weren't saved
-            # before shutdown — leaving the session state stale while items exist in the DB.
-            # bulk_create(ignore_conflicts=True) silently skips duplicates, so we can't rely
-            # on items_to_create to know how many were actually inserted.
-            first_new_line = session.last_line + 1
-            pre_existing = SessionItem.objects.filter(
+        start_offset = session.last_offset
+        f.seek(start_offset)
+
+        # Read the new lines one by one (no intermediate copy of the whole new content
+        # and of its split), creating SessionItem objects for bulk insert (raw content only),
+        # inserted by batches of _ITEMS_BATCH_SIZE.
+        # Binary mode: lines are split on b"\n" only (JSON allows U+2028 unescaped inside
+        # strings), and their lengths are byte counts, like the offset.
+        current_line_num = session.last_line
+        items_to_create: list[SessionItem] = []
+        # Only complete lines are consumed: a line still being written is read again, whole,
+        # on the next sync (the offset stays at its start)
+        new_offset = start_offset
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            new_offset += len(line)
+            line = line.strip()
+            if not line:
+                continue
+            current_line_num += 1
+            items_to_create.append(SessionItem(
                 session=session,
-                line_num__gte=first_new_line,
-                line_num__lte=current_line_num,
-            ).count()
-            actually_new_count = len(items_to_create) - pre_existing
+                line_num=current_line_num,
+                content=line.decode("utf-8"),
+            ))
+            if len(items_to_create) >= _ITEMS_BATCH_SIZE:
+                new_line_nums += _save_session_items(session, items_to_create, new_offset)
+                items_to_create = []
+
+    if new_offset == start_offset:
+        # Update mtime even if no new content (file may have been touched)
+        session.mtime = file_mtime
+        session.save(update_fields=["mtime"])
+        return []
 
-            # Bulk create all items (silently skips items that already exist)
-            SessionItem.objects.bulk_create(items_to_create, ignore_conflicts=True)
+    new_line_nums += _save_session_items(session, items_to_create, new_offset, file_mtime)
+    return new_line_nums
 
-            # Update session tracking fields
-            session.last_line = current_line_num
 
-        # Update offset to end of file
-        session.last_offset = f.tell()
+def _save_session_items(
+    session: Session,
+    items: list[SessionItem],
+    new_offset: int,
+    file_mtime: float | None = None,
+) -> list[int]:
+    """
+    Insert a batch of new raw items and save the session tracking fields up to them.
+
+    The file mtime is only saved with the last batch: if the sync is interrupted
+    before, the next one sees the file as modified and resumes from the saved offset.
+
+    Returns the line_nums of the items that were actually inserted.
+    """
+    actually_new_count = 0
+
+    if items:
+        # Check how many of these line_nums already exist in the DB.
+        # This can happen when the watcher already inserted items (during a previous run)
+        # but the session's tracking fields (last_line, last_offset, mtime) weren't saved
+        # before shutdown — leaving the session state stale while items exist in the DB.
+        # bulk_create(ignore_conflicts=True) silently skips duplicates, so we can't rely
+        # on items to know how many were actually inserted.
+        pre_existing = SessionItem.objects.filter(
+            session=session,
+            line_num__gte=session.last_line + 1,
+            line_num__lte=items[-1].line_num,
+        ).count()
+        actually_new_count = len(items) - pre_existing
+
+        # Bulk create all items (silently skips items that already exist)
+        SessionItem.objects.bulk_create(items, ignore_conflicts=True)
+
+        # Update session tracking fields
+        session.last_line = items[-1].line_num
+
+    # Update offset to the end of the consumed lines
+    session.last_offset = new_offset
+    update_fields = ["last_offset", "last_line"]
+    if file_mtime is not None:
         session.mtime = file_mtime
-        session.save(update_fields=["last_offset", "last_line", "mtime"])
+        update_fields.append("mtime")
+    # If new items were added, reset compute_version to trigger background recompute
+    if actually_new_count > 0 and session.compute_version is not None:
+        session.compute_version = None
+        update_fields.append("compute_version")
+    session.save(update_fields=update_fields)
 
     # Return only truly new line_nums (the last actually_new_count items,
     # since pre-existing items occupy the lower line_nums in the range)
     if actually_new_count > 0:
-        return [item.line_num for item in items_to_create[-actually_new_count:]]
+        return [item.line_num for item in items[-actually_new_count:]]
     return []
 
 
@@ -215,38 +305,26 @@ def _sync_session_subagents(
     project: Project,
     session: Session,
     stats: dict[str, int],
+    db_subagents: dict[str, Session],
 ) -> None:
     """
     Synchronize subagents for a given session.
 
     Scans the session's subagents folder and syncs each subagent file.
+    `db_subagents` are the existing subagents of the session, by agent_id
+    (loaded for the whole project by sync_project).
     Updates stats in place.
     """
     subagent_files = scan_subagents(project.id, session.id)
     if not subagent_files:
         return
 
-    # Get existing subagents from database for this session
-    db_subagents = {
-        s.agent_id: s
-        for s in Session.objects.filter(
-            project=project,
-            type=SessionType.SUBAGENT,
-            parent_session=session,
-        )
-    }
-
     for agent_id, file_path in subagent_files.items():
         if agent_id in db_subagents:
             # Subagent exists in DB, sync items (raw insert only)
             subagent = db_subagents[agent_id]
             new_line_nums = _sync_session_items(subagent, file_path)
             stats["items_added"] += len(new_line_nums)
-
-            # If new items were added, reset compute_version to trigger background recompute
-            if new_line_nums and subagent.compute_version is not None:
-                subagent.compute_version = None
-                subagent.save(update_fields=["compute_version"])
         else:
             # New subagent - check if file has content
             if not check_file_has_content(file_path):
@@ -309,18 +387,20 @@ def sync_project(
     except Project.DoesNotExist:
         project = None
 
-    # Scan session files on disk
-    session_files = scan_sessions(project_id)
+    # Scan session files on disk (and session folders, that may contain subagents)
+    session_files, session_folders = scan_project(project_id)
     disk_session_ids = set(session_files.keys())
 
-    # Get existing sessions from database (only main sessions, not subagents)
+    # Get existing sessions from database, main sessions by id, and subagents by parent
+    # session id then agent_id (one query for all the subagents, not one per session)
+    db_sessions: dict[str, Session] = {}
+    db_subagents: defaultdict[str, dict[str, Session]] = defaultdict(dict)
     if project is not None:
-        db_sessions = {
-            s.id: s
-            for s in Session.objects.filter(project=project, type=SessionType.SESSION)
-        }
-    else:
-        db_sessions = {}
+        for s in Session.objects.filter(project=project):
+            if s.type == SessionType.SESSION:
+                db_sessions[s.id] = s
+            elif s.parent_session_id is not None:
+                db_subagents[s.parent_session_id][s.agent_id] = s
     db_session_ids = set(db_sessions.keys())
 
     # Process sessions that exist on disk
@@ -367,7 +447,8 @@ def sync_project(
                 max_mtime = session.mtime
 
             # Sync subagents for this session
-            _sync_session_subagents(project, session, stats)
+            if session_id in session_folders:
+                _sync_session_subagents(project, session, stats, db_subagents[session_id])
 
             if on_session_progress:
                 on_session_progress(session_id, idx, total_sessions)
@@ -377,17 +458,13 @@ def sync_project(
         new_line_nums = _sync_session_items(session, file_path)
         stats["items_added"] += len(new_line_nums)
 
-        # If new items were added, reset compute_version to trigger background recompute
-        if new_line_nums and session.compute_version is not None:
-            session.compute_version = None
-            session.save(update_fields=["compute_version"])
-
         if session.last_line > 0:
             if session.mtime > max_mtime:
                 max_mtime = session.mtime
 
         # Sync subagents for this session
-        _sync_session_subagents(project, session, stats)
+        if session_id in session_folders:
+            _sync_session_subagents(project, session, stats, db_subagents[session_id])
 
         if on_session_progress:
             on_session_progress(session_id, idx, total_sessions)
@@ -406,23 +483,23 @@ def sync_project(
         )
         stats["sessions_stale"] += len(stale_session_ids)
 
-    # Update project metadata (count visible sessions: with created_at and at least one user message)
-    project.sessions_count = Session.objects.filter(
-        project=project,
-        type=SessionType.SESSION,
-        created_at__isnull=False,
-        user_message_count__gt=0,
-    ).count()
+    # Update project metadata, with a single aggregate over the project sessions:
+    # - sessions_count: visible sessions (with created_at and at least one user message)
+    # - total_cost: same value as Project.recalculate_total_cost()
+    totals = Session.objects.filter(project=project, type=SessionType.SESSION).aggregate(
+        sessions_count=Count("id", filter=Q(created_at__isnull=False, user_message_count__gt=0)),
+        total_cost=Sum("total_cost"),
+    )
+    project.sessions_count = totals["sessions_count"]
+    total_cost = totals["total_cost"] or Decimal(0)
+    project.total_cost = total_cost if total_cost > 0 else None
     project.mtime = max_mtime
     # Project folder exists (we're syncing it), but working directory may have been removed
     if project.directory is not None:
         project.stale = not os.path.isdir(project.directory)
     elif project.stale:
         project.stale = False
-    project.save(update_fields=["sessions_count", "mtime", "stale"])
-
-    # Update project total_cost
-    update_project_total_cost(project.id)
+    project.save(update_fields=["sessions_count", "total_cost", "mtime", "stale"])
 
     elapsed = time.monotonic() - project_start
     logger.info(
@@ -467,13 +544,17 @@ def sync_all(
 
     # Update stale flag for all projects: stale = working directory no longer exists on disk.
     # (directory=None means not yet resolved from session data → not stale)
+    # Changed flags are saved with one UPDATE per new value, not one per project.
+    stale_changes: dict[bool, list[str]] = {True: [], False: []}
     for project in Project.objects.only("id", "directory", "stale"):
         should_be_stale = project.directory is not None and not os.path.isdir(project.directory)
         if project.stale != should_be_stale:
-            project.stale = should_be_stale
-            project.save(update_fields=["stale"])
+            stale_changes[should_be_stale].append(project.id)
         if should_be_stale:
             stats["projects_stale"] += 1
+    for stale, project_ids in stale_changes.items():
+        if project_ids:
+            Project.objects.filter(id__in=project_ids).update(stale=stale)
 
     # Note: projects are NOT created eagerly here. They are created lazily
     # inside sync_project() only when they contain at least one session with content.
@@ -507,10 +588,18 @@ def sync_all(
 
     interrupted = stop_event is not None and stop_event.is_set()
 
-    # Resolve git_root for all projects with a directory (skip if interrupted)
+    # Resolve git_root for all projects with a directory (skip if interrupted).
+    # The resolutions only hit the filesystem (a few stats per directory level, slow on network
+    # filesystems), so they run in threads; the results are stored from this thread.
     if not interrupted:
-        for project in Project.objects.filter(directory__isnull=False, stale=False):
-            ensure_project_git_root(project.id, project.directory)
+        projects = list(Project.objects.filter(directory__isnull=False, stale=False).values_list("id", "directory"))
+        with ThreadPoolExecutor() as executor:
+            results = executor.map(
+                lambda directory: resolve_git_from_path(directory, use_cache=False),
+                [directory for _, directory in projects],
+            )
+            for (project_id, _), result in zip(projects, results):
+                store_project_git_root(project_id, result[0] if result else None)
 
     elapsed = time.monotonic() - sync_start
     if interrupted:
@@ -532,14 +621,18 @@ def sync_all(
 class ProgressDisplay:
     """Console progress display for sync operations."""
 
+    # Minimum delay (in seconds) between two redraws of the sessions progress bar
+    SESSION_PROGRESS_INTERVAL = 0.1
+
     def __init__(self, stream=None):
         self.stream = stream or sys.stdout
-        self.start_time = time.time()
+        self.start_time = time.monotonic()
         self.current_project = ""
         self.project_index = 0
         self.total_projects = 0
         self.session_index = 0
         self.total_sessions = 0
+        self._last_session_draw = 0.0
 
     def _write(self, text: str, end: str = "\n") -> None:
         """Write text to the output stream."""
@@ -547,9 +640,8 @@ class ProgressDisplay:
         self.stream.flush()
 
     def _clear_line(self) -> None:
-        """Clear the current line (for dynamic updates)."""
+        """Clear the current line (for dynamic updates, flushed by the next _write)."""
         self.stream.write("\r\033[K")
-        self.stream.flush()
 
     def _format_time(self, seconds: float) -> str:
         """Format seconds as mm:ss or hh:mm:ss."""
@@ -572,7 +664,7 @@ class ProgressDisplay:
         self.session_index = 0
         self.total_sessions = 0
 
-        elapsed = time.time() - self.start_time
+        elapsed = time.monotonic() - self.start_time
         if index > 1:
             # Estimate remaining time based on average time per project
             avg_time = elapsed / (index - 1)
@@ -589,6 +681,12 @@ class ProgressDisplay:
         self.session_index = index
         self.total_sessions = total
 
+        # Redraw at most every SESSION_PROGRESS_INTERVAL (but always the last one)
+        now = time.monotonic()
+        if index < total and now - self._last_session_draw < self.SESSION_PROGRESS_INTERVAL:
+            return
+        self._last_session_draw = now
+
         bar = self._progress_bar(index, total)
         self._clear_line()
         self._write(f"         {bar} {index}/{total} sessions", end="")
@@ -609,7 +707,7 @@ class ProgressDisplay:
 
     def on_sync_complete(self, stats: dict[str, int]) -> None:
         """Called when the entire sync is complete."""
-        elapsed = time.time() - self.start_time
+        elapsed = time.monotonic() - self.start_time
         self._write("")
         self._write(f"Sync complete in {self._format_time(elapsed)}")
         self._write(f"  Projects: {stats['projects_created']} created, {stats['projects_stale']} stale")
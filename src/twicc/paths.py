@@ -24,6 +24,7 @@ worktree root so each worktree gets its own DB, logs, and .env.
 """
 
 import os
+from functools import lru_cache
 from pathlib import Path
 
 # Environment variable name to override the data directory
@@ -33,12 +34,16 @@ TWICC_DATA_DIR_ENV = "TWICC_DATA_DIR"
 DEFAULT_DATA_DIR = Path.home() / ".twicc"
 
 
+@lru_cache(maxsize=1)
 def get_data_dir() -> Path:
     """Return the resolved data directory.
 
     Priority:
     1. TWICC_DATA_DIR environment variable (if set and non-empty)
     2. ~/.twicc/ (default)
+
+    Resolved once per process (the environment variable is set before starting TwiCC),
+    all the other paths are built from it.
     """
     env_value = os.environ.get(TWICC_DATA_DIR_ENV, "").strip()
     if env_value:
@@ -9,12 +9,17 @@ import asyncio
 import logging
 import os
 import re
+from collections import OrderedDict, defaultdict
+from datetime import date, datetime
+from functools import lru_cache
 from pathlib import Path
 
 import orjson
 from asgiref.sync import sync_to_async
 from channels.layers import get_channel_layer
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, CharField, Value, When
 from watchfiles import Change, awatch
 
 import twicc.search as search
@@ -27,18 +32,19 @@ from twicc.compute import AgentLinkUpdate, AgentStoppedUpdate, ToolResultUpdate,
     extract_item_timestamp, \
     extract_text_from_content, extract_title_from_user_message, get_cached_agent_prompt, get_message_content, \
     get_project_directory, get_project_git_root, get_tool_result_id, is_agent_link_done, \
-    is_tool_result_item, load_project_directories, \
+    is_tool_result_item, LiveGroupBatch, load_project_directories, \
     load_project_git_roots, read_head_branch, resolve_git_from_path, \
     transform_local_command_output, transform_task_notification, \
     update_project_metadata as _update_project_metadata_sync
 from twicc.core.enums import ItemDisplayLevel, ItemKind
-from twicc.core.models import Project, Session, SessionItem, SessionType
+from twicc.core.models import PeriodicActivity, Project, Session, SessionItem, SessionType
 from twicc.core.serializers import (
     serialize_project,
     serialize_session,
     serialize_session_item,
     serialize_session_item_metadata,
 )
+from twicc.initial_sync import check_file_has_content
 
 logger = logging.getLogger(__name__)
 
@@ -47,6 +53,38 @@ logger = logging.getLogger(__name__)
 # Sidechain files like agent-acompact-<hex>.jsonl or agent-aprompt_suggestion-<hex>.jsonl are excluded.
 _REAL_SUBAGENT_RE = re.compile(r"^agent-a[0-9a-f]+\.jsonl$")
 
+# SessionItem fields computed by sync_session_items, updated if the item row already exists
+_ITEM_COMPUTED_FIELDS = (
+    "message_id", "cost", "context_usage", "timestamp", "group_head", "group_tail", "git_directory", "git_branch",
+)
+
+# SessionItem fields used by serialize_session_item and serialize_session_item_metadata
+_SERIALIZED_ITEM_FIELDS = (
+    "line_num", "content", "display_level", "group_head", "group_tail", "kind", "git_directory", "git_branch",
+)
+
+# Session fields that a sync can update (only the ones that actually changed are saved)
+_SESSION_SYNC_FIELDS = (
+    "last_offset", "last_line", "mtime", "user_message_count", "context_usage", "self_cost", "subagents_cost",
+    "total_cost", "cwd", "cwd_git_branch", "git_directory", "git_branch", "model", "slug", "created_at",
+    "last_started_at", "last_updated_at", "last_new_content_at",
+)
+
+# Display levels of the items that are part of groups (computed live while syncing)
+_GROUPED_DISPLAY_LEVELS = frozenset((ItemDisplayLevel.COLLAPSIBLE, ItemDisplayLevel.ALWAYS))
+
+# Kinds of the items that may contain Task tool_uses (see the agent links pass of sync_session_items)
+_TOOL_USE_ITEM_KINDS = frozenset((ItemKind.ASSISTANT_MESSAGE, ItemKind.CONTENT_ITEMS))
+
+# Message ids already seen per session (for cost deduplication), kept between syncs so that
+# an append doesn't reload all the message ids of the session. Only the most recently synced
+# sessions computed with the current compute version are kept, with the last_line of the
+# session they were built at: the set is only reused if the session in DB is still at this
+# line (a session cleared or re-created in DB behind the cache would else have all its new
+# message ids seen as already counted).
+_seen_message_ids_cache: OrderedDict[str, tuple[int, set[str]]] = OrderedDict()
+_SEEN_MESSAGE_IDS_CACHE_SIZE = 1000
+
 
 class ParsedPath:
     """Result of parsing a JSONL file path."""
@@ -65,6 +103,20 @@ class ParsedPath:
         self.parent_session_id = parent_session_id
 
 
+class PassUpdates:
+    """
+    Updates collected while processing the changes of a watcher pass, applied once at its end.
+
+    - parent_session_ids: parent sessions whose subagents got new items (costs to update)
+    - activity_days: days whose activity counters must be recalculated, per project id
+    """
+    __slots__ = ('parent_session_ids', 'activity_days')
+
+    def __init__(self):
+        self.parent_session_ids: set[str] = set()
+        self.activity_days: defaultdict[str, set[date]] = defaultdict(set)
+
+
 def parse_jsonl_path(path: Path, projects_dir: Path) -> ParsedPath | None:
     """
     Parse a JSONL file path and determine its type.
@@ -77,12 +129,23 @@ def parse_jsonl_path(path: Path, projects_dir: Path) -> ParsedPath | None:
     - project_id/agent-*.jsonl (old format, ignored)
     - Any other structure
     """
-    try:
-        relative = path.relative_to(projects_dir)
-    except ValueError:
+    return _parse_jsonl_path_str(str(path), str(projects_dir))
+
+
+@lru_cache(maxsize=4096)
+def _parse_jsonl_path_str(path_str: str, projects_dir_str: str) -> ParsedPath | None:
+    """
+    String-only implementation of parse_jsonl_path, cached by path.
+
+    The watcher sees the same few paths over and over (each append to a session
+    file is an event), so the result is computed once per path, without building
+    Path objects. The returned ParsedPath is shared and must not be modified.
+    """
+    prefix = projects_dir_str.rstrip(os.sep) + os.sep
+    if not path_str.startswith(prefix):
         return None
 
-    parts = relative.parts
+    parts = path_str.removeprefix(prefix).split(os.sep)
 
     if len(parts) == 2:
         # Format: project_id/xxx.jsonl
@@ -114,12 +177,48 @@ def parse_jsonl_path(path: Path, projects_dir: Path) -> ParsedPath | None:
 
 
 async def broadcast_message(channel_layer, message: dict) -> None:
-    """Broadcast a message to all connected WebSocket clients."""
+    """Broadcast a message to all connected WebSocket clients.
+
+    The message is encoded to JSON once here and the resulting text is what
+    travels through the channel layer: the in-memory layer deep-copies the
+    event for every connected client, and each consumer would otherwise
+    re-encode the same (sometimes large) payload on its own.
+
+    Awaiting this doesn't wait for clients to receive the message: the channel
+    layer only puts it in each client's queue (bounded, see CHANNEL_LAYERS), and
+    each consumer sends it on its own. So broadcasts are awaited, which keeps
+    them in order, without a slow client stalling the watcher.
+    """
     await channel_layer.group_send(
         "updates",
         {
             "type": "broadcast",
-            "data": message,
+            "data_type": message.get("type", ""),
+            "text": orjson.dumps(message).decode(),
+        },
+    )
+
+
+async def broadcast_messages(channel_layer, messages: list[dict]) -> None:
+    """Broadcast several messages to all connected WebSocket clients, in a single "batch" message.
+
+    Each message is encoded once. Clients that opted in receive {"type": "batch", "messages": [...]}
+    and handle the messages in order. The other ones, and clients with a ``subscribe`` filter,
+    receive the messages (they subscribed to) individually (see ``UpdatesConsumer.broadcast``).
+    """
+    if not messages:
+        return
+    if len(messages) == 1:
+        await broadcast_message(channel_layer, messages[0])
+        return
+    parts = [(message.get("type", ""), orjson.dumps(message).decode()) for message in messages]
+    await channel_layer.group_send(
+        "updates",
+        {
+            "type": "broadcast",
+            "data_type": "batch",
+            "text": '{"type":"batch","messages":[' + ",".join(text for _, text in parts) + "]}",
+            "parts": parts,
         },
     )
 
@@ -131,9 +230,12 @@ def get_or_create_project(project_id: str) -> tuple[Project, bool]:
 
 
 @sync_to_async
-def update_project_metadata(project: Project) -> None:
-    """Update project sessions_count, mtime, and total_cost from its sessions."""
-    _update_project_metadata_sync(project.id)
+def update_project_metadata(project: Project) -> Project:
+    """Update project sessions_count, mtime, and total_cost from its sessions.
+
+    Returns the up-to-date project, read from the database.
+    """
+    return _update_project_metadata_sync(project.id) or project
 
 
 @sync_to_async
@@ -198,62 +300,82 @@ def create_session(
 
 @sync_to_async
 def get_session_by_id(session_id: str) -> Session | None:
-    """Get a session by ID, or None if not found."""
+    """Get a session by ID (with its project and parent session), or None if not found."""
     try:
-        return Session.objects.get(id=session_id)
+        return Session.objects.select_related("project", "parent_session").get(id=session_id)
     except Session.DoesNotExist:
         return None
 
 
 @sync_to_async
-def check_file_has_content_async(file_path: Path) -> bool:
-    """Check if a JSONL file has any valid lines (async wrapper)."""
-    if not file_path.exists():
-        return False
-
-    with open(file_path, "r", encoding="utf-8") as f:
-        for line in f:
-            if line.strip():
-                return True
-    return False
-
+def get_session_items_and_metadata(
+    session: Session, line_nums: list[int], metadata_line_nums: list[int]
+) -> tuple[list[dict], list[dict]]:
+    """
+    Get full session items (with content) by line_nums, and metadata (without content)
+    for other items by metadata_line_nums, both sorted by line_num.
 
-@sync_to_async
-def get_session_items(session: Session, line_nums: list[int]) -> list[dict]:
-    """Get full session items (with content) by line_nums."""
-    if not line_nums:
-        return []
+    Both lists are loaded with a single query.
+    """
+    if not line_nums and not metadata_line_nums:
+        return [], []
+    full_line_nums = set(line_nums)
     items = SessionItem.objects.filter(
         session=session,
-        line_num__in=line_nums,
-    ).order_by("line_num")
-    return [serialize_session_item(item) for item in items]
+        line_num__in=full_line_nums.union(metadata_line_nums),
+    ).only(*_SERIALIZED_ITEM_FIELDS).order_by("line_num")
+    full_items: list[dict] = []
+    metadata_items: list[dict] = []
+    for item in items:
+        if item.line_num in full_line_nums:
+            full_items.append(serialize_session_item(item))
+        else:
+            metadata_items.append(serialize_session_item_metadata(item))
+    return full_items, metadata_items
 
 
 @sync_to_async
-def get_items_metadata(session: Session, line_nums: list[int]) -> list[dict]:
-    """Get metadata (without content) for specific items by line_nums."""
-    if not line_nums:
-        return []
-    items = SessionItem.objects.filter(
-        session=session,
-        line_num__in=line_nums,
-    ).defer('content').order_by("line_num")
-    return [serialize_session_item_metadata(item) for item in items]
+def recalculate_activities(activity_days: dict[str, set[date]]) -> None:
+    """Recalculate the activity counters of the given days (per project id), in a single transaction."""
+    with transaction.atomic():
+        for project_id, days in activity_days.items():
+            PeriodicActivity.recalculate_for_days(project_id, days)
 
 
 @sync_to_async
-def refresh_session(session: Session) -> Session:
-    """Refresh session from database."""
-    session.refresh_from_db()
-    return session
+def update_parent_sessions_costs(parent_session_ids: set[str]) -> list[Session]:
+    """
+    Recalculate the costs of parent sessions whose subagents changed, in a single UPDATE.
 
+    Uses Session.recalculate_costs_for() which sums SessionItem.cost for both the sessions
+    and their subagents. Returns the updated parent sessions (loaded with their project).
+    """
+    Session.recalculate_costs_for(parent_session_ids)
+    return list(Session.objects.select_related("project").filter(id__in=parent_session_ids))
 
-@sync_to_async
-def refresh_project(project: Project) -> Project:
-    """Refresh project from database."""
-    project.refresh_from_db()
-    return project
+
+async def update_parent_sessions_and_broadcast(parent_session_ids: set[str], channel_layer) -> None:
+    """
+    Update the costs of parent sessions whose subagents changed, then their project metadata,
+    and broadcast them all.
+
+    All parent sessions are expected to belong to the same project (the watcher processes
+    the changes project by project).
+    """
+    parents = await update_parent_sessions_costs(parent_session_ids)
+    if not parents:
+        return
+    messages = [
+        {"type": "session_updated", "session": serialize_session(parent)}
+        for parent in parents
+    ]
+    # Update project metadata (includes total_cost which changes with the parent sessions costs)
+    project = await update_project_metadata(parents[0].project)
+    messages.append({
+        "type": "project_updated",
+        "project": serialize_project(project),
+    })
+    await broadcast_messages(channel_layer, messages)
 
 
 async def _index_new_items_for_search(session: Session, line_nums: list[int]) -> None:
@@ -272,7 +394,7 @@ async def _index_new_items_for_search(session: Session, line_nums: list[int]) ->
                     session=session,
                     line_num__in=line_nums,
                     kind__in=[ItemKind.USER_MESSAGE, ItemKind.ASSISTANT_MESSAGE],
-                )
+                ).only("line_num", "kind", "content", "timestamp")
             )
         )()
 
@@ -335,19 +457,29 @@ async def sync_and_broadcast(
     parsed: ParsedPath,
     change_type: Change,
     channel_layer,
+    pass_updates: PassUpdates,
 ) -> None:
     """
     Handle a session or subagent file change.
 
     Synchronizes with the database and broadcasts updates via WebSocket.
     Empty files (0 lines) are ignored and not created in the database.
+    Updates shared by the changes of the pass (parent session costs, activity
+    counters) are collected in `pass_updates`, for the caller to apply them
+    (see `apply_pass_updates`).
     """
     is_subagent = parsed.type == SessionType.SUBAGENT
 
+    # Check if session already exists in DB (loaded with its project and parent session)
+    session = await get_session_by_id(parsed.session_id)
+
     # For subagents, verify parent session exists
     parent_session: Session | None = None
     if is_subagent:
-        parent_session = await get_session_by_id(parsed.parent_session_id)
+        if session is not None and session.parent_session_id == parsed.parent_session_id:
+            parent_session = session.parent_session
+        else:
+            parent_session = await get_session_by_id(parsed.parent_session_id)
         if parent_session is None:
             # Parent session not yet synced, skip for now
             logger.debug(
@@ -358,7 +490,7 @@ async def sync_and_broadcast(
 
     if change_type == Change.deleted:
         # File deleted - mark as stale
-        session = await get_session_by_id(parsed.session_id)
+        _seen_message_ids_cache.pop(parsed.session_id, None)
         if session and not session.stale:
             session.stale = True
             await sync_to_async(session.save)(update_fields=["stale"])
@@ -367,21 +499,21 @@ async def sync_and_broadcast(
                 "session": serialize_session(session),
             })
             # Update project metadata (includes total_cost which changes for subagents too)
-            project = await get_project_by_id(parsed.project_id)
-            if project:
-                await update_project_metadata(project)
-                project = await refresh_project(project)
-                await broadcast_message(channel_layer, {
-                    "type": "project_updated",
-                    "project": serialize_project(project),
-                })
+            project = await update_project_metadata(session.project)
+            await broadcast_message(channel_layer, {
+                "type": "project_updated",
+                "project": serialize_project(project),
+            })
         return
 
-    # Check if session already exists in DB
-    session = await get_session_by_id(parsed.session_id)
-
-    # Ensure project exists first
-    project, project_created = await get_or_create_project(parsed.project_id)
+    # Ensure project exists first (reusing the one loaded with the session or its parent if any)
+    project_created = False
+    if session is not None and session.project_id == parsed.project_id:
+        project = session.project
+    elif parent_session is not None and parent_session.project_id == parsed.project_id:
+        project = parent_session.project
+    else:
+        project, project_created = await get_or_create_project(parsed.project_id)
     if project_created:
         await broadcast_message(channel_layer, {
             "type": "project_added",
@@ -395,7 +527,8 @@ async def sync_and_broadcast(
 
     if session is None:
         # New file - check if it has content before creating
-        has_content = await check_file_has_content_async(path)
+        # (cheap enough to be done without a thread hop: size check + first chunk read)
+        has_content = check_file_has_content(path)
         if not has_content:
             # Empty file (0 lines) - ignore completely
             return
@@ -415,28 +548,47 @@ async def sync_and_broadcast(
             context_max=pending.get("context_max"),
         )
 
+    # Check for new content before handing over to the sync thread: watchfiles often
+    # reports changes for files with nothing new to read, and the stat is cheap.
+    try:
+        file_stat = path.stat()
+    except FileNotFoundError:
+        file_stat = None
+
     old_title = session.title
-    new_line_nums, modified_line_nums, agent_link_updates, tool_result_updates, agent_stopped_updates = await sync_session_items(session, path)
+    if file_stat is None or is_file_unchanged(session, file_stat):
+        sync_result = [], [], [], [], []
+    else:
+        sync_result = await sync_session_items(session, path, file_stat, pass_updates)
+    new_line_nums, modified_line_nums, agent_link_updates, tool_result_updates, agent_stopped_updates = sync_result
     title_changed = session.title != old_title
 
     if new_line_nums:
-        # Refresh session to get computed values
-        session = await refresh_session(session)
+        # For subagents, the parent session costs have changed: they are recalculated (and the
+        # parent session and the project broadcast) once all the changes of the pass are processed
+        if is_subagent:
+            pass_updates.parent_session_ids.add(parent_session.id)
 
+        # Messages for this change, broadcast together once everything is computed
+        messages: list[dict] = []
+
+        # No need to refresh the session: sync_session_items() updated and saved its computed values
         # Only broadcast if session has user messages — empty sessions (e.g. just
         # system/metadata lines) stay silent in DB until a user message arrives.
         # Exception: TwiCC-initiated sessions (identified by having had pending
         # settings) get an early session_updated so the frontend drops the draft
         # flag immediately, without waiting for the user message to appear in JSONL.
         if session.user_message_count > 0 or pending:
-            await broadcast_message(channel_layer, {
+            messages.append({
                 "type": "session_updated",
                 "session": serialize_session(session),
             })
 
         if session.user_message_count > 0:
             # Broadcast new items (with updated metadata of pre-existing items if any)
-            new_items = await get_session_items(session, new_line_nums)
+            new_items, updated_metadata = await get_session_items_and_metadata(
+                session, new_line_nums, modified_line_nums
+            )
             if new_items:
                 message = {
                     "type": "session_items_added",
@@ -445,31 +597,21 @@ async def sync_and_broadcast(
                     "parent_session_id": parsed.parent_session_id,
                     "items": new_items,
                 }
-                if modified_line_nums:
-                    updated_metadata = await get_items_metadata(session, modified_line_nums)
-                    if updated_metadata:
-                        message["updated_metadata"] = updated_metadata
-                await broadcast_message(channel_layer, message)
-
-            # For subagents, broadcast parent session update (costs have changed)
-            if is_subagent and parent_session:
-                parent_session = await refresh_session(parent_session)
-                await broadcast_message(channel_layer, {
-                    "type": "session_updated",
-                    "session": serialize_session(parent_session),
-                })
+                if updated_metadata:
+                    message["updated_metadata"] = updated_metadata
+                messages.append(message)
 
-            # Update project metadata (includes total_cost which changes for subagents too)
-            await update_project_metadata(project)
-            project = await refresh_project(project)
-            await broadcast_message(channel_layer, {
-                "type": "project_updated",
-                "project": serialize_project(project),
-            })
+            # Update project metadata (for subagents, done with the parent session, see below)
+            if not is_subagent:
+                project = await update_project_metadata(project)
+                messages.append({
+                    "type": "project_updated",
+                    "project": serialize_project(project),
+                })
 
             # Broadcast agent link state changes (subagent linked)
             for update in agent_link_updates:
-                await broadcast_message(channel_layer, {
+                messages.append({
                     "type": "agent_link_created",
                     "parent_session_id": update.parent_session_id,
                     "agent_session_id": update.agent_id,
@@ -482,7 +624,7 @@ async def sync_and_broadcast(
 
             # Broadcast tool result state changes
             for update in tool_result_updates:
-                await broadcast_message(channel_layer, {
+                messages.append({
                     "type": "tool_state",
                     "session_id": update.session_id,
                     "tool_use_id": update.tool_use_id,
@@ -497,27 +639,29 @@ async def sync_and_broadcast(
             for stopped in agent_stopped_updates:
                 stopped_session = await get_session_by_id(stopped.agent_session_id)
                 if stopped_session:
-                    await broadcast_message(channel_layer, {
+                    messages.append({
                         "type": "session_updated",
                         "session": serialize_session(stopped_session),
                     })
 
-            # Index for full-text search (sessions only, not subagents)
-            if not is_subagent:
-                if title_changed:
-                    # Title changed — full session re-index (Tantivy can only delete by session_id,
-                    # not by session_id + from_role, so we must re-index everything)
-                    try:
-                        await asyncio.to_thread(search.reindex_session, session.id)
-                    except Exception:
-                        logger.exception("Error re-indexing session for search after title change (session=%s)", session.id)
-                else:
-                    await _index_new_items_for_search(session, new_line_nums)
+        await broadcast_messages(channel_layer, messages)
+
+        # Index for full-text search (sessions only, not subagents)
+        if session.user_message_count > 0 and not is_subagent:
+            if title_changed:
+                # Title changed — full session re-index (Tantivy can only delete by session_id,
+                # not by session_id + from_role, so we must re-index everything)
+                try:
+                    await asyncio.to_thread(search.reindex_session, session.id)
+                except Exception:
+                    logger.exception("Error re-indexing session for search after title change (session=%s)", session.id)
+            else:
+                await _index_new_items_for_search(session, new_line_nums)
 
-                # Mark session as indexed so the background task doesn't re-index it at next startup
-                if session.search_version != settings.CURRENT_SEARCH_VERSION:
-                    session.search_version = settings.CURRENT_SEARCH_VERSION
-                    await sync_to_async(session.save)(update_fields=["search_version"])
+            # Mark session as indexed so the background task doesn't re-index it at next startup
+            if session.search_version != settings.CURRENT_SEARCH_VERSION:
+                session.search_version = settings.CURRENT_SEARCH_VERSION
+                await sync_to_async(session.save)(update_fields=["search_version"])
 
     elif session.stale:
         # File reappeared - unstale
@@ -529,12 +673,12 @@ async def sync_and_broadcast(
         })
 
     # Auto-add newly created project to workspaces whose patterns match its directory.
+    # (the directory is set during the sync, and kept up to date in the project directory cache)
     if project_created:
-        project = await refresh_project(project)
-        if project.directory:
+        if project_directory := get_project_directory(project.id):
             from twicc.workspaces import auto_add_project_to_workspaces
 
-            await auto_add_project_to_workspaces(project.id, project.directory)
+            await auto_add_project_to_workspaces(project.id, project_directory)
 
 
 # Global stop event for clean shutdown
@@ -555,6 +699,37 @@ def stop_watcher() -> None:
         _stop_event.set()
 
 
+def coalesce_changes(changes: set[tuple[Change, str]]) -> list[tuple[Change, str]]:
+    """
+    Reduce a batch of watchfiles changes to a single change per path, in processing order.
+
+    A batch is an unordered set that often holds several changes for the same path
+    (e.g. added + modified for a new session file). Handlers always sync from the
+    current state of the file, so one call per path is enough:
+    - "deleted" is kept only if the path no longer exists (deleted then re-created is not a deletion)
+    - otherwise "added" wins over "modified"
+
+    Paths are returned shallowest first: project directories, then session files,
+    then subagent files, so a parent session is synced before its subagents.
+    """
+    change_types: dict[str, set[Change]] = {}
+    for change_type, path_str in changes:
+        change_types.setdefault(path_str, set()).add(change_type)
+
+    coalesced: list[tuple[Change, str]] = []
+    for path_str, types in change_types.items():
+        if Change.deleted in types and (len(types) == 1 or not os.path.exists(path_str)):
+            change_type = Change.deleted
+        elif Change.added in types:
+            change_type = Change.added
+        else:
+            change_type = Change.modified
+        coalesced.append((change_type, path_str))
+
+    coalesced.sort(key=lambda change: change[1].count(os.sep))
+    return coalesced
+
+
 async def start_watcher() -> None:
     """
     Start the file watcher for Claude projects directory.
@@ -576,29 +751,78 @@ async def start_watcher() -> None:
     logger.info(f"Starting file watcher on: {projects_dir}")
 
     async for changes in awatch(projects_dir, stop_event=stop_event):
-        for change_type, path_str in changes:
-            try:
-                path = Path(path_str)
+        # Changes are grouped by project, each group processed in order (project directory,
+        # then sessions, then subagents), so that the updates shared by the changes of a
+        # project (parent session costs, project metadata, activity counters) are applied
+        # once per project and per pass. Groups are processed one after the other: the ORM
+        # work runs on the single thread-sensitive sync_to_async thread anyway.
+        changes_by_project: dict[str, list[tuple[Change, str]]] = {}
+        for change_type, path_str in coalesce_changes(changes):
+            project_key = os.path.relpath(path_str, projects_dir).split(os.sep, 1)[0]
+            changes_by_project.setdefault(project_key, []).append((change_type, path_str))
+
+        for project_changes in changes_by_project.values():
+            await process_changes(project_changes, projects_dir, channel_layer)
+
+
+async def process_changes(
+    changes: list[tuple[Change, str]],
+    projects_dir: Path,
+    channel_layer,
+) -> None:
+    """
+    Dispatch watcher changes to the appropriate handlers, one after the other.
 
-                # Handle project directories (direct children of projects_dir)
-                if path.parent == projects_dir and (path.is_dir() or change_type == Change.deleted):
-                    await sync_project_and_broadcast(path, change_type, channel_layer)
-                    continue
+    Errors are logged per change and never interrupt the processing of the others.
+    Updates shared by the changes (parent session costs, activity counters) are
+    applied once, at the end.
+    """
+    projects_dir_str = str(projects_dir)
+    pass_updates = PassUpdates()
+    for change_type, path_str in changes:
+        try:
+            # Handle project directories (direct children of projects_dir)
+            if os.path.dirname(path_str) == projects_dir_str and (
+                change_type == Change.deleted or os.path.isdir(path_str)
+            ):
+                await sync_project_and_broadcast(Path(path_str), change_type, channel_layer)
+                continue
 
-                # Skip non-jsonl files
-                if not path_str.endswith(".jsonl"):
-                    continue
+            # Skip non-jsonl files
+            if not path_str.endswith(".jsonl"):
+                continue
 
-                # Parse path to determine type (session or subagent)
-                parsed = parse_jsonl_path(path, projects_dir)
-                if parsed is None:
-                    # Invalid path (e.g., old-style agent-*.jsonl at project level)
-                    continue
+            # Parse path to determine type (session or subagent)
+            parsed = _parse_jsonl_path_str(path_str, projects_dir_str)
+            if parsed is None:
+                # Invalid path (e.g., old-style agent-*.jsonl at project level)
+                continue
 
-                # Sync and broadcast (works for both sessions and subagents)
-                await sync_and_broadcast(path, parsed, change_type, channel_layer)
-            except Exception:
-                logger.exception("Error processing watcher change %s on %s", change_type, path_str)
+            # Sync and broadcast (works for both sessions and subagents)
+            await sync_and_broadcast(Path(path_str), parsed, change_type, channel_layer, pass_updates)
+        except Exception:
+            logger.exception("Error processing watcher change %s on %s", change_type, path_str)
+
+    await apply_pass_updates(pass_updates, channel_layer)
+
+
+async def apply_pass_updates(pass_updates: PassUpdates, channel_layer) -> None:
+    """
+    Apply the updates collected while processing the changes of a watcher pass.
+
+    Errors are logged and don't prevent the other updates from being applied.
+    """
+    if pass_updates.activity_days:
+        try:
+            await recalculate_activities(pass_updates.activity_days)
+        except Exception:
+            logger.exception("Error recalculating activities for %s", dict(pass_updates.activity_days))
+
+    if pass_updates.parent_session_ids:
+        try:
+            await update_parent_sessions_and_broadcast(pass_updates.parent_session_ids, channel_layer)
+        except Exception:
+            logger.exception("Error updating parent sessions %s", sorted(pass_updates.parent_session_ids))
 
 
 def _inject_cached_original_file(parsed: dict, session_id: str, line_num: int) -> str | None:
@@ -634,20 +858,39 @@ def _inject_cached_original_file(parsed: dict, session_id: str, line_num: int) -
     return orjson.dumps(parsed).decode('utf-8')
 
 
+def is_file_unchanged(session: Session, file_stat: os.stat_result) -> bool:
+    """
+    Check if a session file has nothing new since its last sync.
+
+    Check file size too: mtime has ~1s resolution, so two writes within the same second
+    share the same mtime. Without the size check, the second write would be silently skipped.
+    """
+    return session.mtime == file_stat.st_mtime and session.last_offset >= file_stat.st_size
+
+
 @sync_to_async
+@transaction.atomic
 def sync_session_items(
-    session: Session, file_path: Path
+    session: Session,
+    file_path: Path,
+    file_stat: os.stat_result | None = None,
+    pass_updates: PassUpdates | None = None,
 ) -> tuple[list[int], list[int], list[AgentLinkUpdate], list[ToolResultUpdate], list[AgentStoppedUpdate]]:
     """
     Synchronize session items from a JSONL file.
 
     Reads new lines from the file starting at last_offset.
     The session must already be saved to the database.
+    file_stat can be passed if the caller already has it, to avoid a new stat call.
+    If pass_updates is passed, the affected activity days are added to it instead
+    of being recalculated right away.
 
     Also handles session title updates:
     - First USER_MESSAGE sets initial title if not already set
     - CUSTOM_TITLE items update the title of their target session
 
+    All the writes (items, links, titles, session) are done in a single transaction.
+
     Returns:
         A tuple of:
         - List of line_nums of new items added (sorted)
@@ -656,37 +899,52 @@ def sync_session_items(
         - List of ToolResultUpdate for tool completion state changes to broadcast
         - List of AgentStoppedUpdate for subagents that naturally finished
     """
-    if not file_path.exists():
-        return [], [], [], [], []
+    if file_stat is None:
+        try:
+            file_stat = file_path.stat()
+        except FileNotFoundError:
+            return [], [], [], [], []
 
-    stat = file_path.stat()
-    file_mtime = stat.st_mtime
+    file_mtime = file_stat.st_mtime
 
     # If mtime hasn't changed and no new data appended, nothing to do.
-    # Check file size too: mtime has ~1s resolution, so two writes within the same second
-    # share the same mtime. Without the size check, the second write would be silently skipped.
-    if session.mtime == file_mtime and session.last_offset >= stat.st_size:
+    if is_file_unchanged(session, file_stat):
         return [], [], [], [], []
 
-    with open(file_path, "r", encoding="utf-8") as f:
-        # Seek to last known position
-        f.seek(session.last_offset)
-
-        # Read remaining content
-        new_content = f.read()
-        if not new_content:
-            # Update mtime even if no new content (file may have been touched)
+    # Read raw bytes: offsets are byte positions anyway, and orjson parses bytes
+    # directly (no intermediate str for the whole chunk, no re-encoding per line).
+    # A positional read on a raw file descriptor avoids setting up a buffered file
+    # object (and a seek) for what is usually a small append.
+    # The file is not even opened when the stat shows nothing was appended (file touched).
+    # The size to read comes from that same stat (no fstat): content appended since then
+    # triggers a new change and is read by the next sync, with a matching mtime.
+    new_content = b""
+    if file_stat.st_size > session.last_offset:
+        fd = os.open(file_path, os.O_RDONLY)
+        try:
+            new_content = os.pread(fd, file_stat.st_size - session.last_offset, session.last_offset)
+        finally:
+            os.close(fd)
+
+    # Only consume complete lines: a line still being written is read again, whole, on the next
+    # change (copying the content only in this rare case)
+    if not new_content.endswith(b"\n"):
+        new_content = new_content[:new_content.rfind(b"\n") + 1]
+
+    if not new_content:
+        # Update mtime even if no new content (file may have been touched)
+        if session.mtime != file_mtime:
             session.mtime = file_mtime
             session.save(update_fields=["mtime"])
-            return [], [], [], [], []
+        return [], [], [], [], []
 
-        # Split into lines (filter out empty lines)
-        lines = [line for line in new_content.split("\n") if line.strip()]
+    # Values of the synced fields before this sync, to only save the ones that changed
+    previous_values = [getattr(session, field) for field in _SESSION_SYNC_FIELDS]
 
-        # Capture file position and save offset+mtime immediately to release the file
-        new_offset = f.tell()
+    # Split into lines (filter out empty lines), stripped once here
+    lines = [stripped for line in new_content.split(b"\n") if (stripped := line.strip())]
 
-    session.last_offset = new_offset
+    session.last_offset += len(new_content)
     session.mtime = file_mtime
 
     if not lines:
@@ -702,9 +960,15 @@ def sync_session_items(
     # Track if we've already set initial title for this session (from first user message ever)
     initial_title_needs_set = session.title is None
 
+    # Number of user messages in this batch (for session.user_message_count)
+    new_user_messages = 0
+
     # Track first timestamp in this batch (for session.created_at)
     first_timestamp: datetime | None = None
 
+    # Days whose activity counters are affected by this batch (only items that contribute)
+    affected_days: set[date] = set()
+
     # Track lifecycle timestamps for this batch
     last_started_at_update: datetime | None = None  # Set if a SessionStart hookEvent is found
     last_updated_at: datetime | None = None  # Last item timestamp in this batch
@@ -731,23 +995,27 @@ def sync_session_items(
         and not is_agent_link_done(session.parent_session_id, session.id)
     )
 
-    # Load existing message_ids for deduplication of cost computation
-    seen_message_ids: set[str] = set(
-        SessionItem.objects.filter(
-            session_id=session.id,
-            message_id__isnull=False,
-        ).values_list('message_id', flat=True)
-    )
+    # Prompt from the first user message already in DB (subagent link only), loaded at most once.
+    # Nothing to load on the first sync of the session: it has no items in DB yet, and its first
+    # user message is in this batch.
+    existing_prompt: str | None = None
+    existing_prompt_loaded = session.last_line == 0
+
+    # Line_nums of pre-existing items whose group was updated by the new items
+    modified_line_nums: set[int] = set()
+    # Group membership of the new items is tracked in memory and saved with the items themselves
+    group_batch = LiveGroupBatch(session.id)
+
+    # Existing message_ids for deduplication of cost computation. The set is taken out of
+    # the cache while it's being updated, and only put back once the sync is committed.
+    seen_message_ids = _pop_seen_message_ids(session)
 
     for line in lines:
-        line = line.strip()
-        if not line:
-            line = "{}"
         current_line_num += 1
         item = SessionItem(
             session=session,
             line_num=current_line_num,
-            content=line,
+            content=line.decode("utf-8"),
         )
         try:
             parsed = orjson.loads(line)
@@ -778,6 +1046,7 @@ def sync_session_items(
         metadata = compute_item_metadata(parsed)
         item.display_level = metadata['display_level']
         item.kind = metadata['kind']
+        is_user_message = item.kind == ItemKind.USER_MESSAGE
 
         # Extract timestamp
         item.timestamp = extract_item_timestamp(parsed)
@@ -800,6 +1069,13 @@ def sync_session_items(
 
         # Compute cost and context usage (with deduplication)
         compute_item_cost_and_usage(item, parsed, seen_message_ids)
+        if item.timestamp is not None and (is_user_message or item.cost):
+            affected_days.add(item.timestamp.date())
+
+        # Group membership for COLLAPSIBLE and ALWAYS items (computed in memory for the
+        # items of this batch, so it doesn't need them to be in the database yet)
+        if item.display_level in _GROUPED_DISPLAY_LEVELS:
+            modified_line_nums.update(compute_item_metadata_live(session.id, item, parsed, group_batch))
 
         items_to_create.append((item, parsed))
 
@@ -816,8 +1092,11 @@ def sync_session_items(
         if item_slug := parsed.get('slug'):
             last_slug = item_slug
 
+        if is_user_message:
+            new_user_messages += 1
+
         # Handle title extraction
-        if item.kind == ItemKind.USER_MESSAGE and initial_title_needs_set:
+        if is_user_message and initial_title_needs_set:
             # First user message in this batch: set initial title
             title = extract_title_from_user_message(parsed)
             if title:
@@ -828,17 +1107,14 @@ def sync_session_items(
         if subagent_needs_link and (agent_id := parsed.get('agentId')):
             prompt = get_cached_agent_prompt(session.parent_session_id, agent_id)
             if not prompt:
-                # try to get from db
-                if (first_user_message := session.items.filter(kind=ItemKind.USER_MESSAGE).first()) is not None:
-                    try:
-                        first_user_message_parsed = orjson.loads(first_user_message.content)
-                    except orjson.JSONDecodeError:
-                        pass
-                    else:
-                        prompt = extract_text_from_content(get_message_content(first_user_message_parsed))
+                # try to get from db (items of this batch are not inserted yet, so it can't change during the loop)
+                if not existing_prompt_loaded:
+                    existing_prompt = _get_first_user_message_prompt(session)
+                    existing_prompt_loaded = True
+                prompt = existing_prompt
                 if not prompt:
                     # not in db so we may be the first one
-                    if item.kind == ItemKind.USER_MESSAGE:
+                    if is_user_message:
                         content = get_message_content(parsed)
                         prompt = extract_text_from_content(content)
 
@@ -860,39 +1136,27 @@ def sync_session_items(
             if custom_title and isinstance(custom_title, str):
                 session_title_updates[target_session_id] = custom_title
 
-    # Bulk create all items
+    # Bulk create all items, with all their computed fields. Rows may already exist for some of
+    # these lines (if a previous sync was interrupted before saving the session): their computed
+    # fields are updated instead.
     items_only = [item for item, _ in items_to_create]
-    SessionItem.objects.bulk_create(items_only, ignore_conflicts=True)
+    SessionItem.objects.bulk_create(
+        items_only,
+        update_conflicts=True,
+        unique_fields=["session", "line_num"],
+        update_fields=_ITEM_COMPUTED_FIELDS,
+    )
 
-    # Track line_nums of new and updated items
-    new_line_nums: set[int] = {item.line_num for item in items_only}
-    modified_line_nums: set[int] = set()
+    # Save the new group tails of pre-existing items (groups continued by this batch)
+    group_batch.flush()
 
-    # Second pass: compute group membership, tool_result links, and update cost/usage/timestamp fields
-    for item, parsed in items_to_create:
-        # Build the update dict for this item (includes cost/usage/timestamp fields)
-        update_fields = {
-            'message_id': item.message_id,
-            'cost': item.cost,
-            'context_usage': item.context_usage,
-            'timestamp': item.timestamp,
-        }
-
-        # Group membership for COLLAPSIBLE and ALWAYS items
-        if item.display_level in (ItemDisplayLevel.COLLAPSIBLE, ItemDisplayLevel.ALWAYS):
-            item_modified_lines = compute_item_metadata_live(session.id, item, parsed)
-            modified_line_nums.update(item_modified_lines)
-            update_fields['group_head'] = item.group_head
-            update_fields['group_tail'] = item.group_tail
-            update_fields['git_directory'] = item.git_directory
-            update_fields['git_branch'] = item.git_branch
-
-        # Update the item in DB with all computed fields
-        SessionItem.objects.filter(
-            session=session,
-            line_num=item.line_num
-        ).update(**update_fields)
+    # Track line_nums of new items
+    # (line_nums are assigned in order, so new_line_nums is already sorted)
+    new_line_nums: list[int] = [item.line_num for item in items_only]
 
+    # Second pass, once the items are in the database: tool_result and agent links
+    # (linking a tool_result to its tool_use may need items of this batch)
+    for item, parsed in items_to_create:
         # Tool result links (tool_result items are DEBUG_ONLY)
         if is_tool_result_item(parsed):
             tool_result_update = create_tool_result_link_live(session.id, item, parsed)
@@ -911,7 +1175,7 @@ def sync_session_items(
         # Note: Task tool_uses are often in CONTENT_ITEMS lines (streaming splits
         # the text and tool_use into separate lines, and tool_use-only lines have
         # no visible content so they're classified as CONTENT_ITEMS, not ASSISTANT_MESSAGE).
-        if session.type == SessionType.SESSION and item.kind in (ItemKind.ASSISTANT_MESSAGE, ItemKind.CONTENT_ITEMS):
+        if session.type == SessionType.SESSION and item.kind in _TOOL_USE_ITEM_KINDS:
             agent_link_updates.extend(create_agent_link_from_tool_use(session.id, item, parsed))
 
     # Check if project needs git_root resolution
@@ -919,22 +1183,34 @@ def sync_session_items(
     if any(item.git_directory for item, _ in items_to_create) and get_project_git_root(session.project_id) is None:
         ensure_project_git_root(session.project_id)
 
-    # Apply title updates
-    for target_session_id, title in session_title_updates.items():
-        Session.objects.filter(id=target_session_id).update(title=title)
+    # Apply title updates (in a single UPDATE, whatever the number of target sessions)
+    if session_title_updates:
+        Session.objects.filter(id__in=list(session_title_updates)).update(
+            title=Case(
+                *(When(id=target_session_id, then=Value(title)) for target_session_id, title in session_title_updates.items()),
+                output_field=CharField(),
+            )
+        )
         # If updating the current session, update the object too
-        if target_session_id == session.id:
-            session.title = title
+        if session.id in session_title_updates:
+            session.title = session_title_updates[session.id]
+
+    # Update user_message_count from the new items. It's recounted from the DB (using the
+    # optimized index) while the session isn't computed with the current compute version, as
+    # the kinds of its existing items may still change. No need to recount on the first sync:
+    # the items and the session are saved in the same transaction, so a session that was never
+    # synced has no items yet.
+    if session.compute_version != settings.CURRENT_COMPUTE_VERSION:
+        session.user_message_count = SessionItem.objects.filter(
+            session=session,
+            kind=ItemKind.USER_MESSAGE
+        ).count()
+    else:
+        session.user_message_count += new_user_messages
 
     # Update session tracking fields
     session.last_line = current_line_num
 
-    # Recompute user_message_count using the optimized index
-    session.user_message_count = SessionItem.objects.filter(
-        session=session,
-        kind=ItemKind.USER_MESSAGE
-    ).count()
-
     # Update session cost and context usage from the new items
     # Find last context_usage among new items (most recent non-null value)
     for item, _ in reversed(items_to_create):
@@ -1038,39 +1314,67 @@ def sync_session_items(
     if last_new_content_at is not None:
         session.last_new_content_at = last_new_content_at
 
-    # Recalculate activity counters for affected days (only items that contribute)
-    affected_days = {
-        item.timestamp.date()
-        for item, _ in items_to_create
-        if item.timestamp and (item.kind == ItemKind.USER_MESSAGE or item.cost)
-    }
+    # Recalculate activity counters for affected days (a new session counts on its creation day)
     if is_new_session and session.type == SessionType.SESSION and first_timestamp:
         affected_days.add(first_timestamp.date())
 
-    session.save(update_fields=["last_offset", "last_line", "mtime", "user_message_count", "context_usage", "self_cost", "subagents_cost", "total_cost", "cwd", "cwd_git_branch", "git_directory", "git_branch", "model", "slug", "created_at", "last_started_at", "last_updated_at", "last_new_content_at"])
+    session.save(update_fields=[
+        field
+        for field, previous_value in zip(_SESSION_SYNC_FIELDS, previous_values)
+        if getattr(session, field) != previous_value
+    ])
+    # Only put the set back in the cache once the items are committed (a rolled back sync would
+    # leave ids of lines that are not in the DB), and only for sessions computed with the current
+    # compute version: the message_id of the items of other sessions may still be filled by the
+    # background compute, which would make the cached set stale.
+    if session.compute_version == settings.CURRENT_COMPUTE_VERSION:
+        transaction.on_commit(lambda: _store_seen_message_ids(session, seen_message_ids))
 
     # Recalculate activities after session.save (needs created_at in DB for session_count)
-    from twicc.core.models import PeriodicActivity
-    PeriodicActivity.recalculate_for_days(session.project_id, affected_days)
+    if pass_updates is not None:
+        if affected_days:
+            pass_updates.activity_days[session.project_id].update(affected_days)
+    else:
+        PeriodicActivity.recalculate_for_days(session.project_id, affected_days)
 
-    # If this is a subagent, propagate cost to parent session
-    if session.type == SessionType.SUBAGENT and session.parent_session_id:
-        _update_parent_session_costs(session.parent_session_id)
+    # Exclude new items (all after the first new line_num) from modified_line_nums
+    first_new_line_num = new_line_nums[0]
+    modified_line_nums_before = sorted(line_num for line_num in modified_line_nums if line_num < first_new_line_num)
+    return new_line_nums, modified_line_nums_before, agent_link_updates, tool_result_updates, agent_stopped_updates
 
-    # Exclude new items from modified_line_nums
-    return sorted(new_line_nums), sorted(modified_line_nums - new_line_nums), agent_link_updates, tool_result_updates, agent_stopped_updates
 
+def _pop_seen_message_ids(session: Session) -> set[str]:
+    """Take the seen message ids of a session out of the cache, loading them from the DB if not cached.
 
-def _update_parent_session_costs(parent_session_id: str) -> None:
+    The cached set is ignored if it was not built at the current last_line of the session.
     """
-    Recalculate the parent session's costs from SessionItem data.
+    cached = _seen_message_ids_cache.pop(session.id, None)
+    if cached is not None and cached[0] == session.last_line:
+        return cached[1]
+    return set(
+        SessionItem.objects.filter(
+            session_id=session.id,
+            message_id__isnull=False,
+        ).values_list('message_id', flat=True)
+    )
 
-    Called when a subagent's cost changes. Uses recalculate_costs()
-    which sums SessionItem.cost for both the session and its subagents.
-    """
+
+def _store_seen_message_ids(session: Session, seen_message_ids: set[str]) -> None:
+    """Put the seen message ids of a session (back) in the cache, evicting the oldest sessions if full."""
+    _seen_message_ids_cache[session.id] = (session.last_line, seen_message_ids)
+    while len(_seen_message_ids_cache) > _SEEN_MESSAGE_IDS_CACHE_SIZE:
+        _seen_message_ids_cache.popitem(last=False)
+
+
+def _get_first_user_message_prompt(session: Session) -> str | None:
+    """Get the prompt text of the first user message of a session already saved in DB, if any."""
+    first_user_message = session.items.filter(kind=ItemKind.USER_MESSAGE).only("content").first()
+    if first_user_message is None:
+        return None
     try:
-        parent = Session.objects.get(id=parent_session_id)
-    except Session.DoesNotExist:
-        return
-    parent.recalculate_costs()
-    parent.save(update_fields=["self_cost", "subagents_cost", "total_cost"])
+        parsed = orjson.loads(first_user_message.content)
+    except orjson.JSONDecodeError:
+        return None
+    return extract_text_from_content(get_message_content(parsed))
+
+
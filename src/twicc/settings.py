@@ -55,11 +55,15 @@ TWICC_PASSWORD_HASH = os.environ.get("TWICC_PASSWORD_HASH", "")
 
 # Session settings
 SESSION_COOKIE_NAME = os.environ.get("TWICC_SESSION_COOKIE", "sessionid")
-SESSION_ENGINE = "django.contrib.sessions.backends.db"
+# Sessions are read from the (default, local memory) cache, falling back to the DB
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
 SESSION_COOKIE_AGE = 60 * 60 * 24 * 30  # 30 days
 SESSION_COOKIE_HTTPONLY = True
 SESSION_COOKIE_SAMESITE = "Lax"
-SESSION_SAVE_EVERY_REQUEST = True  # Refresh expiry on each request
+# Expiry is refreshed by PasswordAuthMiddleware at most once per SESSION_REFRESH_INTERVAL,
+# not on each request, to avoid a DB write per request
+SESSION_SAVE_EVERY_REQUEST = False
+SESSION_REFRESH_INTERVAL = 60 * 60 * 24  # 1 day
 
 ROOT_URLCONF = "twicc.urls"
 
@@ -71,19 +75,26 @@ CHANNEL_LAYERS = {
     }
 }
 
+# A single alias: Django opens one connection per thread, and WAL mode already lets
+# readers run concurrently with the writer. A read-only "replica" alias on the same
+# file would not add concurrency (thread-sensitive sync_to_async runs the ORM calls
+# of the async code on a single thread) and would lose read-your-writes in transactions.
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": get_db_path(),
         "OPTIONS": {
-            "timeout": 30,
+            # Take the write lock when a transaction starts instead of upgrading a read lock
+            # mid-transaction, which fails immediately (no busy wait) if another connection writes.
+            "transaction_mode": "IMMEDIATE",
             "init_command": """
                 PRAGMA journal_mode=WAL;
                 PRAGMA synchronous=NORMAL;
                 PRAGMA busy_timeout=30000;
                 PRAGMA mmap_size=134217728;
                 PRAGMA journal_size_limit=27103364;
-                PRAGMA cache_size=2000;
+                PRAGMA cache_size=-65536;
+                PRAGMA temp_store=MEMORY;
             """,
         },
     }
@@ -99,7 +110,9 @@ FRONTEND_DIST_DIR = PACKAGE_DIR / "static" / "frontend"
 CLAUDE_PROJECTS_DIR = Path.home() / ".claude" / "projects"
 
 # Logging configuration
-# All logs go to file (<data_dir>/logs/backend.log)
+# All logs go to file (<data_dir>/logs/backend.log), written by a background thread:
+# loggers only put records in a queue, the listener feeding the file handler is
+# started in CoreConfig.ready()
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -116,15 +129,19 @@ LOGGING = {
             "formatter": "standard",
             "encoding": "utf-8",
         },
+        "queue": {
+            "class": "logging.handlers.QueueHandler",
+            "handlers": ["file"],
+        },
     },
     "loggers": {
         "twicc": {
-            "handlers": ["file"],
+            "handlers": ["queue"],
             "level": "DEBUG" if DEBUG else "INFO",
             "propagate": False,
         },
         "uvicorn": {
-            "handlers": ["file"],
+            "handlers": ["queue"],
             "level": "INFO",
             "propagate": False,
         },
@@ -2,7 +2,10 @@
 
 from twicc.settings import *  # noqa: F401, F403
 
-# Use in-memory SQLite for tests
+# Use in-memory SQLite for tests.
+# No init_command: the production PRAGMAs (WAL, synchronous, ...) don't apply to an
+# in-memory database, and Django already names the test database with a shared-cache
+# URI ("file:memorydb_default?mode=memory&cache=shared") so all connections see it.
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
@@ -11,20 +11,62 @@ receive the current progress immediately.
 from __future__ import annotations
 
 import logging
+import time
+from dataclasses import dataclass
 
+import orjson
 from channels.layers import get_channel_layer
 
 logger = logging.getLogger(__name__)
 
+
+@dataclass(slots=True)
+class PhaseState:
+    """Progress of a startup phase, updated in place at each progress report."""
+
+    phase: str
+    current: int
+    total: int
+    completed: bool
+
+    def as_message(self) -> dict:
+        """Return the startup_progress message sent to WebSocket clients."""
+        return {
+            "type": "startup_progress",
+            "phase": self.phase,
+            "current": self.current,
+            "total": self.total,
+            "completed": self.completed,
+        }
+
+
 # Module-level state: current startup progress for each phase.
-# None means the phase hasn't started yet. A dict means the phase
+# None means the phase hasn't started yet. A PhaseState means the phase
 # is active or completed — completed states are kept so clients
 # connecting mid-startup can reconstruct the full picture.
-_current_progress: dict[str, dict | None] = {
+_current_progress: dict[str, PhaseState | None] = {
     "initial_sync": None,
     "background_compute": None,
 }
 
+# Minimum delay between two broadcasts of a phase, unless its percentage changed
+# or it completed (state is always updated, only the broadcast is skipped)
+BROADCAST_MIN_INTERVAL = 0.05
+
+# Time and percentage of the last broadcast of each phase
+_last_broadcast: dict[str, tuple[float, int]] = {}
+
+# Channel layer used for the broadcasts, resolved on first use
+_channel_layer = None
+
+
+def _get_channel_layer():
+    """Return the channel layer, resolving it on first call only."""
+    global _channel_layer
+    if _channel_layer is None:
+        _channel_layer = get_channel_layer()
+    return _channel_layer
+
 
 def get_startup_progress() -> list[dict]:
     """Return list of startup progress states for WS connection init.
@@ -33,18 +75,18 @@ def get_startup_progress() -> list[dict]:
     connected clients. Includes completed phases so reconnecting clients
     can show them as finished.
     """
-    return [state for state in _current_progress.values() if state is not None]
+    return [state.as_message() for state in _current_progress.values() if state is not None]
 
 
 def set_startup_progress(phase: str, current: int, total: int, *, completed: bool = False) -> None:
     """Update the module-level progress state."""
-    _current_progress[phase] = {
-        "type": "startup_progress",
-        "phase": phase,
-        "current": current,
-        "total": total,
-        "completed": completed,
-    }
+    state = _current_progress.get(phase)
+    if state is None:
+        _current_progress[phase] = PhaseState(phase, current, total, completed)
+    else:
+        state.current = current
+        state.total = total
+        state.completed = completed
 
 
 async def broadcast_startup_progress(phase: str, current: int, total: int, *, completed: bool = False) -> None:
@@ -52,22 +94,32 @@ async def broadcast_startup_progress(phase: str, current: int, total: int, *, co
 
     Updates the module-level state first (so new connections get the latest),
     then broadcasts to all connected WebSocket clients via the "updates" group.
+
+    Broadcasts are coalesced: progress that changes neither the percentage nor
+    the completion is only broadcast if the previous broadcast of the phase is
+    at least BROADCAST_MIN_INTERVAL seconds old.
     """
     set_startup_progress(phase, current, total, completed=completed)
 
-    message = {
-        "type": "startup_progress",
-        "phase": phase,
-        "current": current,
-        "total": total,
-        "completed": completed,
-    }
-
-    channel_layer = get_channel_layer()
-    await channel_layer.group_send(
+    now = time.monotonic()
+    percentage = current * 100 // max(total, 1)
+    last_broadcast = _last_broadcast.get(phase)
+    if (
+        not completed
+        and last_broadcast is not None
+        and percentage == last_broadcast[1]
+        and now - last_broadcast[0] < BROADCAST_MIN_INTERVAL
+    ):
+        return
+    _last_broadcast[phase] = (now, percentage)
+
+    # The message is only built when it's actually broadcast, and encoded once for all
+    # clients (the pre-encoded text is forwarded as-is by UpdatesConsumer.broadcast)
+    await _get_channel_layer().group_send(
         "updates",
         {
             "type": "broadcast",
-            "data": message,
+            "data_type": "startup_progress",
+            "text": orjson.dumps(_current_progress[phase].as_message()).decode(),
         },
     )
@@ -1212,3 +1212,72 @@ class TestDebugOnlyItems:
         assert get_item_state(items[0]) == (None, 3)     # A: suffix connected
         assert get_item_state(items[1]) == (None, None)  # D: no group
         assert get_item_state(items[2]) == (1, 3)        # B: in A's suffix group
+
+
+# =============================================================================
+# Live processing with a LiveGroupBatch (watcher mode)
+# =============================================================================
+
+
+def run_live_batch(session_id: str, items: list[SessionItem]):
+    """Run live processing for a batch of items, like the watcher does.
+
+    Items are processed in memory with a LiveGroupBatch, then saved together before
+    the batch is flushed.
+    """
+    from twicc.compute import LiveGroupBatch
+    from twicc.core.enums import ItemDisplayLevel
+
+    # Step 1: Compute display_level and kind, saved with the items (like the watcher's bulk_create)
+    parsed_items = []
+    for item in items:
+        parsed = orjson.loads(item.content)
+        metadata = compute_item_metadata(parsed)
+        item.display_level = metadata['display_level']
+        item.kind = metadata['kind']
+        parsed_items.append((item, parsed))
+    SessionItem.objects.bulk_update(items, ['display_level', 'kind'])
+
+    # Step 2: Compute group membership in memory, then save everything at once
+    batch = LiveGroupBatch(session_id)
+    modified_line_nums: set[int] = set()
+    for item, parsed in parsed_items:
+        if item.display_level in (ItemDisplayLevel.COLLAPSIBLE, ItemDisplayLevel.ALWAYS):
+            modified_line_nums.update(compute_item_metadata_live(session_id, item, parsed, batch))
+    SessionItem.objects.bulk_update(items, ['group_head', 'group_tail'])
+    batch.flush()
+    return modified_line_nums
+
+
+LIVE_BATCH_SEQUENCES = [
+    [make_collapsible(), make_always(prefix=True)],
+    [make_collapsible(), make_collapsible(), make_collapsible()],
+    [make_collapsible(), make_collapsible(), make_always()],
+    [make_collapsible(), make_always(prefix=True), make_collapsible()],
+    [make_always(suffix=True), make_collapsible(), make_collapsible(), make_always(prefix=True)],
+    [make_always(suffix=True), make_debug(), make_collapsible(), make_always(prefix=True, suffix=True)],
+    [make_always(prefix=True, suffix=True), make_always(prefix=True, suffix=True), make_collapsible()],
+    [make_collapsible(), make_debug(), make_collapsible(), make_always(), make_collapsible()],
+]
+
+
+class TestLiveGroupBatch:
+    """Batched live processing must give the same result as item-by-item live processing."""
+
+    @pytest.mark.parametrize("contents", LIVE_BATCH_SEQUENCES)
+    @pytest.mark.parametrize("split", [0, 1, 2])
+    def test_same_as_live(self, test_session, contents, split):
+        """Items before `split` are synced in a first batch, the others in a second one."""
+        other_session = Session.objects.create(id="other-session", project=test_session.project)
+
+        reference_items = create_items(other_session, contents)
+        run_live(other_session.id, reference_items)
+        expected = [get_item_state(item) for item in reference_items]
+
+        items = create_items(test_session, contents)
+        if split:
+            run_live_batch(test_session.id, items[:split])
+        modified_line_nums = run_live_batch(test_session.id, items[split:])
+
+        assert [get_item_state(item) for item in items] == expected
+        assert all(line_num <= split for line_num in modified_line_nums)